@@ -0,0 +1,92 @@
+"""Persistent caches for costly computations"""
+
+import dbm
+import hashlib
+import pickle
+from pathlib import Path
+from typing import List, Optional
+
+import fasteners
+from datamaestro_text.data.ir import IDItem, TextItem, TopicRecord
+
+from xpmir.rankers import Retriever, ScoredDocument
+from xpmir.utils.utils import easylog
+
+logger = easylog()
+
+
+class RetrieverCache:
+    """A persistent (on-disk) cache of retrieved documents
+
+    Results are stored in a DBM database: keys are SHA256 digests of the
+    retriever identifier, the query ID and the query text, values are
+    LZ4-compressed pickled lists of scored documents. Requires the `lz4`
+    package.
+
+    The database is only opened within a `with` block, during which an
+    inter-process lock is held (so that the cache can be shared between
+    concurrent tasks): blocks should thus be kept short, i.e. not span the
+    retrieval itself.
+
+    Only the retriever (experimaestro) identifier is used, which does not
+    depend on `Meta` parameters: retrievers that only differ by such
+    parameters (e.g. `use_fp16` for
+    :py:class:`~xpmir.rankers.TwoStageRetriever`) share their cached results.
+
+    Example:
+
+    ```
+    cache = RetrieverCache(path, retriever)
+    with cache:
+        scored_documents = cache.get(topic)
+    ```
+    """
+
+    def __init__(self, path: Path, retriever: Retriever):
+        """Creates the cache for a retriever loaded within a task"""
+        import lz4.frame
+
+        self.path = path
+        self._compression = lz4.frame
+        self._retriever_id = retriever.__xpmidentifier__.all
+        self._lock = fasteners.InterProcessLock(f"{path}.lock")
+        self._db = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock.acquire()
+        try:
+            self._db = dbm.open(str(self.path), "c")
+        except Exception:
+            self._lock.release()
+            raise
+        return self
+
+    def __exit__(self, *args):
+        try:
+            self._db.close()
+            self._db = None
+        finally:
+            self._lock.release()
+
+    def _key(self, topic: TopicRecord) -> bytes:
+        text_item = topic.get(TextItem)
+        key = (
+            self._retriever_id,
+            topic[IDItem].id,
+            None if text_item is None else text_item.text,
+        )
+        return hashlib.sha256(pickle.dumps(key)).digest()
+
+    def get(self, topic: TopicRecord) -> Optional[List[ScoredDocument]]:
+        """Returns the cached results for the query, or None"""
+        value = self._db.get(self._key(topic))
+        if value is None:
+            return None
+        return pickle.loads(self._compression.decompress(value))
+
+    def put(self, topic: TopicRecord, scored_documents: List[ScoredDocument]):
+        """Stores the results for the given query"""
+        self._db[self._key(topic)] = self._compression.compress(
+            pickle.dumps(list(scored_documents))
+        )
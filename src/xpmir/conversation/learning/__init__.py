@@ -47,13 +47,13 @@ class DatasetConversationEntrySampler(BaseSampler, DatasetConversationBase):
     def __iter__(self) -> RandomSerializableIterator[Record]:
         return RandomSerializableIterator(self.random, self.get_iterator)
 
-    def get_iterator(self, random: np.random.RandomState):
+    def get_iterator(self, random: np.random.Generator):
         return DatasetConversationEntrySamplerIterator(self, random)
 
 
 class DatasetConversationEntrySamplerIterator(Iterator[Record]):
     def __init__(
-        self, sampler: DatasetConversationEntrySampler, random: np.random.RandomState
+        self, sampler: DatasetConversationEntrySampler, random: np.random.Generator
     ):
         self.sampler = sampler
         self.random = random
@@ -63,4 +63,4 @@ class DatasetConversationEntrySamplerIterator(Iterator[Record]):
             raise ValueError(
                 "Random state is not initialized. Call the iterator first."
             )
-        return self.sampler.records[self.random.randint(0, len(self.sampler.records))]
+        return self.sampler.records[self.random.integers(0, len(self.sampler.records))]
@@ -1,5 +1,5 @@
-from typing import Callable, List
-from experimaestro import Config, Param
+from typing import Callable, List, Optional
+from experimaestro import Config, Meta, Param
 import torch.nn as nn
 import torch
 from abc import ABC, abstractmethod
@@ -41,7 +41,9 @@ class DistributedHook(InitializationHook):
         info = state.device_information
         if isinstance(info, DistributedDeviceInformation):
             logger.info("Using a distributed model with rank=%d", info.rank)
-            return nn.parallel.DistributedDataParallel(model, device_ids=[info.rank])
+            return nn.parallel.DistributedDataParallel(
+                model, device_ids=[info.device], gradient_as_bucket_view=True
+            )
         else:
             if not isinstance(model, nn.DataParallel):
                 n_gpus = torch.cuda.device_count()
@@ -58,6 +60,38 @@ class DistributedHook(InitializationHook):
         return model
 
 
+class CompileHook(InitializationHook):
+    """Hook to compile the model modules with :py:func:`torch.compile`
+
+    Modules are compiled in place (through :py:meth:`torch.nn.Module.compile`),
+    so that their state dictionary (and hence checkpoints) are not modified.
+    Compiled kernels are generated when the module is first called, and are
+    reused as long as the input shapes do not change (e.g. when padding to a
+    fixed length).
+    """
+
+    models: Param[List[DistributableModel]]
+    """The models to compile"""
+
+    mode: Meta[Optional[str]] = None
+    """Compilation mode (e.g. `max-autotune`), see :py:func:`torch.compile`"""
+
+    fullgraph: Meta[bool] = False
+    """If true, fails if the module cannot be captured in a single graph"""
+
+    dynamic: Meta[Optional[bool]] = None
+    """Use dynamic shapes (None lets torch decide)"""
+
+    def after(self, state: ComputationContext):
+        for model in self.models:
+            model.distribute_models(self.update)
+
+    def update(self, model: nn.Module) -> nn.Module:
+        logger.info("Compiling %s (mode: %s)", model.__class__.__qualname__, self.mode)
+        model.compile(mode=self.mode, fullgraph=self.fullgraph, dynamic=self.dynamic)
+        return model
+
+
 class DataParallel(torch.nn.DataParallel):
     """Subclasses DataParallel for serialization
 
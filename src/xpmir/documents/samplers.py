@@ -78,7 +78,7 @@ class RandomDocumentSampler(DocumentSampler):
 
     def iter(self, count) -> Iterator[str]:
         """Iterate over the documents"""
-        state = np.random.RandomState() if self.random is None else self.random.state
+        state = np.random.default_rng() if self.random is None else self.random.state
         docids = state.choice(
             np.arange(self.documents.documentcount), size=count, replace=False
         )
@@ -108,7 +108,7 @@ class RandomSpanSampler(BatchwiseSampler, PairwiseSampler):
         spanlen = min(self.max_spansize, len(text) // 2)
 
         max_start1 = len(text) - spanlen * 2
-        start1 = random.randint(0, max_start1) if max_start1 > 0 else 0
+        start1 = random.integers(0, max_start1) if max_start1 > 0 else 0
         end1 = start1 + spanlen
         if start1 > 0 and text[start1 - 1] != " ":
             start1 = text.find(" ", start1) + 1
@@ -116,7 +116,7 @@ class RandomSpanSampler(BatchwiseSampler, PairwiseSampler):
             end1 = text.rfind(" ", 0, end1)
 
         max_start2 = len(text) - spanlen
-        start2 = random.randint(end1, max_start2) if max_start2 > end1 else end1
+        start2 = random.integers(end1, max_start2) if max_start2 > end1 else end1
         end2 = start2 + spanlen
         if text[start2 - 1] != " ":
             start2 = text.find(" ", start2) + 1
@@ -130,8 +130,8 @@ class RandomSpanSampler(BatchwiseSampler, PairwiseSampler):
         return (text[start1:end1], text[start2:end2])
 
     def pairwise_iter(self) -> SerializableIterator[PairwiseRecord, Any]:
-        def iter(random: np.random.RandomState):
-            iter = self.documents.iter_sample(lambda m: random.randint(0, m))
+        def iter(random: np.random.Generator):
+            iter = self.documents.iter_sample(lambda m: random.integers(0, m))
 
             while True:
                 record_pos_qry = next(iter)
@@ -148,7 +148,7 @@ class RandomSpanSampler(BatchwiseSampler, PairwiseSampler):
                 yield PairwiseRecord(
                     create_record(text=spans_pos_qry[0]),
                     create_record(text=spans_pos_qry[1]),
-                    create_record(text=spans_neg[random.randint(0, 2)]),
+                    create_record(text=spans_neg[random.integers(0, 2)]),
                 )
 
         return RandomSerializableIterator(self.random, iter)
@@ -156,11 +156,11 @@ class RandomSpanSampler(BatchwiseSampler, PairwiseSampler):
     def batchwise_iter(
         self, batch_size: int
     ) -> SerializableIterator[ProductRecords, Any]:
-        def iterator(random: np.random.RandomState):
+        def iterator(random: np.random.Generator):
             # Pre-compute relevance matrix
             relevances = torch.diag(torch.ones(batch_size, dtype=torch.float))
 
-            iter = self.documents.iter_sample(lambda m: random.randint(0, m))
+            iter = self.documents.iter_sample(lambda m: random.integers(0, m))
 
             while True:
                 batch = ProductRecords()
@@ -1,14 +1,15 @@
 import inspect
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 from attrs import define
-from datamaestro_text.interfaces.trec import write_run_dict
 import pandas as pd
 from pathlib import Path
 from typing import DefaultDict, Dict, List, Protocol, Union, Optional
 import ir_measures
-from experimaestro import Task, Param, pathgenerator, Annotated, tags, TagDict
+from experimaestro import Task, Param, Meta, pathgenerator, Annotated, tags, TagDict
+from experimaestro import tqdm
 from datamaestro_text.data.ir import (
     Adhoc,
     AdhocAssessments,
@@ -20,16 +21,39 @@ from datamaestro_text.data.ir import (
 )
 from datamaestro_text.data.ir.trec import TrecAdhocRun, TrecAdhocResults
 from datamaestro_text.transforms.ir import TopicWrapper
+from xpmir.caching import RetrieverCache
 from xpmir.measures import Measure
 import xpmir.measures as m
 from xpmir.metrics import evaluator
-from xpmir.rankers import Retriever
+from xpmir.letor.records import TopicRecord
+from xpmir.rankers import Retriever, ScoredDocument
 from xpmir.utils.logging import easylog
 from experimaestro.launchers import Launcher
 
 logger = easylog()
 
 
+WRITE_BUFFER_SIZE = 1 << 20
+"""Buffer size used when writing runs and results"""
+
+
+def write_run_dict(run: AdhocRunDict, run_path: Path):
+    """Writes a run in the TREC format (documents are sorted by decreasing
+    score)
+
+    Lines are formatted and written by topic to limit the number of I/O calls
+    """
+    with run_path.open("wt", buffering=WRITE_BUFFER_SIZE) as fp:
+        for query_id, scored_documents in run.items():
+            ranked = sorted(scored_documents.items(), key=lambda x: x[1], reverse=True)
+            fp.writelines(
+                [
+                    f"{query_id} Q0 {doc_id} {rank} {score} run\n"
+                    for rank, (doc_id, score) in enumerate(ranked, 1)
+                ]
+            )
+
+
 def get_evaluator(metrics: List[ir_measures.Metric], assessments: AdhocAssessments):
     qrels = {
         assessedTopic.topic_id: {r.doc_id: r.rel for r in assessedTopic.assessments}
@@ -78,23 +102,76 @@ class BaseEvaluation(Task):
 
         evaluator = get_evaluator([measure() for measure in self.measures], assessments)
 
-        def print_line(fp, measure, scope, value):
-            fp.write("{:25s} {:10s} {:.4f}\n".format(measure, scope, value))
-
-        with self.detailed.open("w") as fp:
-            for metric in evaluator.iter_calc(run):
-                print_line(fp, str(metric.measure), metric.query_id, metric.value)
+        # Detailed results (tab separated, formatted by pandas)
+        detailed = pd.DataFrame(
+            [
+                (str(metric.measure), metric.query_id, metric.value)
+                for metric in evaluator.iter_calc(run)
+            ],
+            columns=["measure", "query_id", "value"],
+        )
+        detailed.to_csv(
+            self.detailed, sep="\t", float_format="%.4f", header=False, index=False
+        )
 
         with self.aggregated.open("w") as fp:
-            for key, value in evaluator.calc_aggregate(run).items():
-                print_line(fp, str(key), "all", value)
+            fp.writelines(
+                "{:25s} {:10s} {:.4f}\n".format(str(key), "all", value)
+                for key, value in evaluator.calc_aggregate(run).items()
+            )
 
 
-def get_run(retriever: Retriever, dataset: Adhoc) -> AdhocRunDict:
-    """Returns the scored documents for each topic in a dataset"""
-    results = retriever.retrieve_all(
-        {topic[IDItem].id: topic for topic in dataset.topics.iter()}
-    )
+def retrieve_all(
+    retriever: Retriever, topics: Dict[str, TopicRecord], workers: int = 1
+) -> Dict[str, List[ScoredDocument]]:
+    """Retrieves the documents for all the topics
+
+    :param workers: if greater than 1, topics are processed in parallel by
+        this number of threads (the retriever should be thread-safe);
+        otherwise, :py:meth:`Retriever.retrieve_all` is used
+    """
+    if workers <= 1:
+        return retriever.retrieve_all(topics)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(retriever.retrieve, topics.values())
+        return dict(zip(topics.keys(), tqdm(results, total=len(topics))))
+
+
+def get_run(
+    retriever: Retriever,
+    dataset: Adhoc,
+    cache: Optional[RetrieverCache] = None,
+    workers: int = 1,
+) -> AdhocRunDict:
+    """Returns the scored documents for each topic in a dataset
+
+    :param cache: if given, results are first looked up in the cache, and only
+        the missing ones are retrieved (and then cached)
+    :param workers: number of threads used to retrieve documents (see
+        :py:func:`retrieve_all`)
+    """
+    topics = {topic[IDItem].id: topic for topic in dataset.topics.iter()}
+    if cache is None:
+        results = retrieve_all(retriever, topics, workers)
+    else:
+        results = {}
+        with cache:
+            for qid, topic in topics.items():
+                if (scoredocs := cache.get(topic)) is not None:
+                    results[qid] = scoredocs
+
+        logger.info("Found %d/%d topics in the cache", len(results), len(topics))
+        missing = retrieve_all(
+            retriever,
+            {qid: topic for qid, topic in topics.items() if qid not in results},
+            workers,
+        )
+        with cache:
+            for qid, scoredocs in missing.items():
+                cache.put(topics[qid], scoredocs)
+        results.update(missing)
+
     return {
         qid: {sd.document[IDItem].id: sd.score for sd in scoredocs}
         for qid, scoredocs in results.items()
@@ -152,9 +229,23 @@ class Evaluate(BaseEvaluation, Task):
     topic_wrapper: Param[Optional[TopicWrapper]] = None
     """Topic extractor"""
 
+    cache_path: Meta[Optional[Path]] = None
+    """If set, retrieved documents are cached on disk at this path (the cache
+    can be shared between evaluations, see
+    :py:class:`~xpmir.caching.RetrieverCache`)"""
+
+    workers: Meta[int] = 1
+    """Number of threads used to retrieve documents for the topics. Only use
+    values greater than 1 with thread-safe retrievers (e.g. those releasing
+    the GIL, like Anserini)"""
+
     def execute(self):
         self.retriever.initialize()
-        run = get_run(self.retriever, self.dataset)
+        if self.cache_path is None:
+            run = get_run(self.retriever, self.dataset, workers=self.workers)
+        else:
+            cache = RetrieverCache(self.cache_path, self.retriever)
+            run = get_run(self.retriever, self.dataset, cache, self.workers)
         self._execute(run, self.dataset.assessments)
 
 
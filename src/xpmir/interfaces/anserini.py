@@ -8,7 +8,7 @@ import os
 import re
 import subprocess
 import sys
-from typing import List, Optional
+from typing import Dict, List, Optional
 from experimaestro import tqdm as xpmtqdm, Task, Meta, field, PathGenerator
 
 from datamaestro_text.data.ir import (
@@ -31,6 +31,7 @@ from tqdm import tqdm
 from xpmir.index.anserini import Index
 from xpmir.rankers import Retriever, ScoredDocument, document_cache
 from xpmir.rankers.standard import BM25, QLDirichlet, Model
+from xpmir.utils.multiprocessing import available_cpus
 from xpmir.utils.utils import Handler, StreamGenerator, needs_java
 
 pyserini_java = needs_java(11)
@@ -68,8 +69,13 @@ class IndexCollection(Index, Task):
     documents: Param[Documents]
     """The documents to index"""
 
-    threads: Meta[int] = 8
-    """Number of threads when indexing"""
+    threads: Meta[Optional[int]] = None
+    """Number of threads when indexing (by default, the number of CPUs available
+    to the process, at most :py:attr:`MAX_THREADS`)"""
+
+    MAX_THREADS = 16
+    """Default maximum number of threads (Anserini indexing does not scale well
+    beyond)"""
 
     path: Meta[Path] = field(default_factory=PathGenerator("index"))
 
@@ -79,7 +85,8 @@ class IndexCollection(Index, Task):
     def execute(self):
         command = javacommand()
         command.append(IndexCollection.CLASSPATH)
-        command.extend(["-index", self.path, "-threads", self.threads])
+        threads = self.threads or min(available_cpus(), IndexCollection.MAX_THREADS)
+        command.extend(["-index", self.path, "-threads", threads])
 
         chandler = Handler()
 
@@ -275,6 +282,10 @@ class AnseriniRetriever(Retriever):
     model: Param[Model]
     k: Param[int] = 1500
 
+    threads: Meta[Optional[int]] = None
+    """Number of threads used when retrieving documents for a set of topics
+    (by default, the number of CPUs available to the process)"""
+
     @cached_property
     def searcher(self):
         from pyserini.search.lucene import LuceneSearcher
@@ -305,6 +316,22 @@ class AnseriniRetriever(Retriever):
         # see
         # https://github.com/castorini/anserini/blob/master/src/main/java/io/anserini/search/SimpleSearcher.java
         hits = self.searcher.search(record[TextItem].text, k=self.k)
+        return self._scored_documents(hits)
+
+    def retrieve_all(
+        self, queries: Dict[str, TopicRecord]
+    ) -> Dict[str, List[ScoredDocument]]:
+        # Searches all the topics at once (in parallel within the JVM)
+        qids = list(queries.keys())
+        results = self.searcher.batch_search(
+            [queries[qid][TextItem].text for qid in qids],
+            qids,
+            k=self.k,
+            threads=self.threads or available_cpus(),
+        )
+        return {qid: self._scored_documents(results[qid]) for qid in qids}
+
+    def _scored_documents(self, hits) -> List[ScoredDocument]:
         store = self.get_store()
 
         # Batch retrieve documents
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, TypeVar, Sequence, Iterator, Iterable
+from typing import Optional, TypeVar, Sequence, Iterator, Iterable, Union
 import numpy as np
 from functools import cached_property
 from experimaestro import Config, Param
@@ -14,8 +14,8 @@ class Random(Config):
     """The seed to use so the random process is deterministic"""
 
     @cached_property
-    def state(self) -> np.random.RandomState:
-        return np.random.RandomState(self.seed)
+    def state(self) -> np.random.Generator:
+        return np.random.default_rng(self.seed)
 
     def __getstate__(self):
         return {"seed": self.seed}
@@ -24,8 +24,13 @@ class Random(Config):
 class Sampler(Config, EasyLogger):
     """Abstract data sampler"""
 
-    def initialize(self, random: Optional[np.random.RandomState]):
-        self.random = random or np.random.RandomState(random.randint(0, 2**31))
+    def initialize(
+        self, random: Optional[Union[np.random.Generator, np.random.RandomState]]
+    ):
+        if isinstance(random, np.random.RandomState):
+            # Legacy random state: seeds a generator from it
+            random = np.random.default_rng(random.randint(0, 2**31))
+        self.random = random or np.random.default_rng()
 
 
 T = TypeVar("T")
@@ -60,13 +60,18 @@ def mp_launcher(rank, path, world_size, callback, taskenv, args, kwargs):
     TaskEnv._instance = taskenv
     taskenv.slave = rank == 0
 
-    logger.info("Initializing process group [%d]", rank)
+    # Sets the current device, so that tensors created on the "cuda" device
+    # (and collective operations) use the GPU of this process
+    device = torch.device(f"cuda:{rank}")
+    torch.cuda.set_device(device)
+
+    backend = "nccl" if dist.is_nccl_available() else "gloo"
+    logger.info("Initializing process group [%d] with %s", rank, backend)
     dist.init_process_group(
-        "gloo", init_method=f"file://{path}", rank=rank, world_size=world_size
+        backend, init_method=f"file://{path}", rank=rank, world_size=world_size
     )
 
     logger.info("Calling callback [%d]", rank)
-    device = torch.device(f"cuda:{rank}")
     callback(
         DistributedDeviceInformation(
             device=device, main=rank == 0, rank=rank, count=world_size
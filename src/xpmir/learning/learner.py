@@ -124,6 +124,14 @@ class Learner(Task, EasyLogger):
     use_fp16: Param[bool] = False
     """Use mixed precision when training"""
 
+    amp_dtype: Param[str] = "float16"
+    """Data type used for mixed precision (`float16` or `bfloat16`). The
+    gradient scaler is only used with `float16`."""
+
+    allow_tf32: Param[bool] = False
+    """Allows TensorFloat-32 for matrix multiplications and convolutions (on
+    Ampere or newer GPUs)"""
+
     optimizers: Param[List[ParameterOptimizer]]
     """The list of parameter optimizers"""
 
@@ -152,6 +160,10 @@ class Learner(Task, EasyLogger):
 
     def __validate__(self):
         assert self.optimizers, "At least one optimizer should be defined"
+        assert self.amp_dtype in (
+            "float16",
+            "bfloat16",
+        ), f"Unsupported mixed precision data type {self.amp_dtype}"
         assert len(set(listener.id for listener in self.listeners)) == len(
             self.listeners
         ), "IDs of listeners should be unique"
@@ -211,11 +223,15 @@ class Learner(Task, EasyLogger):
         )
 
         # Sets the random seed
-        seed = self.random.state.randint((2**32) - 1)
+        seed = self.random.state.integers((2**32) - 1)
         np.random.seed(seed)
         torch.manual_seed(seed)
         torch.cuda.manual_seed_all(seed)
 
+        if self.allow_tf32:
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+
         # Initialize the scorer and trainer
         self.logger.info("model initialization")
         self.model.initialize(ModuleInitMode.DEFAULT.to_options(self.random.state))
@@ -233,7 +249,7 @@ class Learner(Task, EasyLogger):
             self.optimizers,
             num_training_steps,
             self.model,
-            self.use_fp16,
+            self.use_fp16 and self.amp_dtype == "float16",
             hooks=[hook for hook in self.hooks if isinstance(hook, OptimizationHook)],
             trainer_context=self.context,
         )
@@ -345,6 +361,7 @@ class Learner(Task, EasyLogger):
                                 # Computes the gradient
                                 with torch.autocast(
                                     device_information.device.type,
+                                    dtype=getattr(torch, self.amp_dtype),
                                     enabled=self.use_fp16,
                                 ):
                                     self.trainer.process_batch(batch)
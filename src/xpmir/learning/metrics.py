@@ -1,5 +1,6 @@
-from typing import Dict
+from typing import Dict, Union
 import logging
+import torch
 from torch.utils.tensorboard.writer import SummaryWriter
 
 
@@ -28,27 +29,31 @@ class Metric:
 
 
 class ScalarMetric(Metric):
-    """Represents a scalar metric"""
+    """Represents a scalar metric
 
-    sum: float
+    The value can be a (detached) scalar tensor: in that case, it is
+    accumulated on its device, and only synchronized when computed or reported
+    """
 
-    def __init__(self, key: str, value: float, count: int):
+    sum: Union[float, torch.Tensor]
+
+    def __init__(self, key: str, value: Union[float, torch.Tensor], count: int):
         super().__init__(key, count)
         self.sum = value * count
 
     def _merge(self, other: "ScalarMetric"):
-        self.sum += other.sum
+        self.sum = self.sum + other.sum
         self.count += other.count
 
-    def compute(self):
-        return self.sum / self.count
+    def compute(self) -> float:
+        return float(self.sum / self.count)
 
     def report(self, step: int, writer: SummaryWriter, prefix: str):
         if self.count == 0:
             logging.warning("Count is 0 when reporting metrics")
         writer.add_scalar(
             f"{prefix}/{self.key}",
-            self.sum / self.count,
+            float(self.sum / self.count),
             step,
         )
 
@@ -129,7 +129,7 @@ class ModuleInitMode(Enum):
     #: number generator to initialize the values)
     RANDOM = 2
 
-    def to_options(self, random: Optional[np.random.RandomState] = None):
+    def to_options(self, random: Optional[np.random.Generator] = None):
         return ModuleInitOptions(self, random)
 
 
@@ -139,7 +139,7 @@ class ModuleInitOptions:
     mode: ModuleInitMode
 
     #: Random generator (only defined when mode is RANDOM)
-    random: Optional[np.random.RandomState] = None
+    random: Optional[np.random.Generator] = None
 
 
 class Module(Config, Initializable, torch.nn.Module):
@@ -30,7 +30,7 @@ class Trainer(Config, EasyLogger):
 
     def initialize(
         self,
-        random: np.random.RandomState,
+        random: np.random.Generator,
         context: TrainerContext,
     ):
         self.random = random
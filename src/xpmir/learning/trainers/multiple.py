@@ -15,7 +15,7 @@ class MultipleTrainer(Trainer):
 
     def initialize(
         self,
-        random: np.random.RandomState,
+        random: np.random.Generator,
         context: TrainerContext,
     ):
         super().initialize(random, context)
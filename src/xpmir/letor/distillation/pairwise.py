@@ -108,7 +108,7 @@ class DistillationPairwiseTrainer(LossTrainer):
 
     def initialize(
         self,
-        random: np.random.RandomState,
+        random: np.random.Generator,
         context: TrainerContext,
     ):
         super().initialize(random, context)
@@ -115,7 +115,7 @@ class DistillationPairwiseSampler(Sampler):
 
     samples: Param[PairwiseDistillationSamples]
 
-    def initialize(self, random: np.random.RandomState):
+    def initialize(self, random: np.random.Generator):
         super().initialize(random)
 
     def pairwise_iter(self) -> SerializableIterator[PairwiseDistillationSample, Any]:
@@ -1,3 +1,4 @@
+from array import array
 import io
 import json
 from pathlib import Path
@@ -17,7 +18,7 @@ from datamaestro_text.data.ir import (
     DocumentRecord,
     IDItem,
 )
-from experimaestro import Param, tqdm, Task, Annotated, pathgenerator
+from experimaestro import Param, Meta, tqdm, Task, Annotated, pathgenerator
 from experimaestro.annotations import cache
 from experimaestro.compat import cached_property
 import torch
@@ -39,6 +40,7 @@ from xpmir.utils.iter import (
     SerializableIterator,
     SerializableIteratorAdapter,
     SkippingIterator,
+    SkippingIteratorState,
     RandomStateSerializableAdaptor,
     InfiniteSkippingIterator,
     iterable_of,
@@ -300,9 +302,9 @@ class PointwiseModelBasedSampler(PointwiseSampler, ModelBasedSampler):
         nneg = len(self.neg_records)
         while True:
             if self.random.random() < self.relevant_ratio:
-                yield self.prepare(self.pos_records[self.random.randint(0, npos)])
+                yield self.prepare(self.pos_records[self.random.integers(0, npos)])
             else:
-                yield self.prepare(self.neg_records[self.random.randint(0, nneg)])
+                yield self.prepare(self.neg_records[self.random.integers(0, nneg)])
 
     def pointwise_iter(self) -> SerializableIterator[PointwiseRecord, Any]:
         npos = len(self.pos_records)
@@ -311,9 +313,9 @@ class PointwiseModelBasedSampler(PointwiseSampler, ModelBasedSampler):
         def iter(random):
             while True:
                 if self.random.random() < self.relevant_ratio:
-                    yield self.prepare(self.pos_records[self.random.randint(0, npos)])
+                    yield self.prepare(self.pos_records[self.random.integers(0, npos)])
                 else:
-                    yield self.prepare(self.neg_records[self.random.randint(0, nneg)])
+                    yield self.prepare(self.neg_records[self.random.integers(0, nneg)])
 
         return RandomSerializableIterator(self.random, iter)
 
@@ -321,7 +323,7 @@ class PointwiseModelBasedSampler(PointwiseSampler, ModelBasedSampler):
 class PairwiseModelBasedSampler(PairwiseSampler, ModelBasedSampler):
     """A pairwise sampler based on a retrieval model"""
 
-    def initialize(self, random: np.random.RandomState):
+    def initialize(self, random: np.random.Generator):
         super().initialize(random)
 
         self.retriever.initialize()
@@ -336,7 +338,7 @@ class PairwiseModelBasedSampler(PairwiseSampler, ModelBasedSampler):
     def sample(self, samples: List[Tuple[str, int, float]]):
         text = None
         while text is None:
-            docid, rel, score = samples[self.random.randint(0, len(samples))]
+            docid, rel, score = samples[self.random.integers(0, len(samples))]
             document = self.document(docid).update(ScoredItem(score))
             text = document[TextItem].text
         return document
@@ -345,7 +347,7 @@ class PairwiseModelBasedSampler(PairwiseSampler, ModelBasedSampler):
         def iter(random):
             while True:
                 title, positives, negatives = self.topics[
-                    random.randint(0, len(self.topics))
+                    random.integers(0, len(self.topics))
                 ]
                 yield PairwiseRecord(
                     create_record(text=title),
@@ -391,13 +393,119 @@ class PairwiseInBatchNegativesSampler(BatchwiseSampler):
         return SerializableIteratorAdapter(self.sampler.pairwise_iter(), iter)
 
 
+class StringArray:
+    """A read-only array of strings stored on disk (UTF-8 contents and offsets),
+    accessed through memory-mapping"""
+
+    def __init__(self, path: Path):
+        self.offsets = np.load(StringArray.offsets_path(path), mmap_mode="r")
+        self.data = (
+            np.memmap(path, dtype=np.uint8, mode="r")
+            if self.offsets[-1] > 0
+            else np.zeros(0, dtype=np.uint8)
+        )
+
+    @staticmethod
+    def offsets_path(path: Path):
+        return path.parent / f"{path.name}.offsets.npy"
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, ix: int) -> str:
+        return self.data[self.offsets[ix] : self.offsets[ix + 1]].tobytes().decode()
+
+    class Writer:
+        def __init__(self, path: Path):
+            self.path = path
+            self.fp = path.open("wb")
+            self.offsets = array("q", [0])
+
+        def append(self, text: str):
+            self.offsets.append(self.offsets[-1] + self.fp.write(text.encode()))
+
+        def close(self):
+            self.fp.close()
+            np.save(
+                StringArray.offsets_path(self.path),
+                np.frombuffer(self.offsets, dtype=np.int64),
+            )
+
+
+class TripletCacheIterator(SerializableIterator[PairwiseRecord, SkippingIteratorState]):
+    """Iterates over cached triplets – restoring a state is done in constant
+    time"""
+
+    def __init__(self, arrays: List[Tuple[StringArray, StringArray]]):
+        self.arrays = arrays
+        self.position = 0
+
+    def state_dict(self) -> SkippingIteratorState:
+        return {"count": self.position}
+
+    def load_state_dict(self, state: SkippingIteratorState):
+        self.position = state["count"]
+
+    def __next__(self) -> PairwiseRecord:
+        if self.position >= len(self.arrays[0][0]):
+            raise StopIteration()
+
+        records = []
+        for ids, texts in self.arrays:
+            records.append(
+                create_record(id=ids[self.position] or None, text=texts[self.position])
+            )
+        self.position += 1
+        return PairwiseRecord(*records)
+
+
 class TripletBasedSampler(PairwiseSampler):
     """Sampler based on a triplet source"""
 
     source: Param[TrainingTriplets]
     """Triplets"""
 
+    cached: Meta[bool] = False
+    """If true, the triplets (IDs and texts) are stored on disk the first time
+    they are used, and read from memory-mapped files afterwards. This avoids
+    processing the source again (e.g. when restoring from a checkpoint). Only
+    works with finite sources."""
+
+    CACHE_KEYS = ["query", "positive", "negative"]
+
+    @cache("triplets")
+    def _cached_triplets(self, path: Path) -> List[Tuple[StringArray, StringArray]]:
+        if not path.is_dir():
+            self.logger.info("Caching triplets in %s", path)
+            tmppath = path.with_suffix(".tmp")
+            tmppath.mkdir(parents=True, exist_ok=True)
+
+            writers = [
+                (
+                    StringArray.Writer(tmppath / f"{key}.ids"),
+                    StringArray.Writer(tmppath / f"{key}.text"),
+                )
+                for key in TripletBasedSampler.CACHE_KEYS
+            ]
+            for triplet in tqdm(self.source.iter(), unit="triplets"):
+                for record, (ids, texts) in zip(triplet, writers):
+                    ids.append(str(record[IDItem].id) if record.has(IDItem) else "")
+                    texts.append(record[TextItem].text)
+
+            for ids, texts in writers:
+                ids.close()
+                texts.close()
+            tmppath.rename(path)
+
+        return [
+            (StringArray(path / f"{key}.ids"), StringArray(path / f"{key}.text"))
+            for key in TripletBasedSampler.CACHE_KEYS
+        ]
+
     def pairwise_iter(self) -> SerializableIterator[PairwiseRecord, Any]:
+        if self.cached:
+            return TripletCacheIterator(self._cached_triplets())
+
         iterator = (
             PairwiseRecord(topic, pos, neg) for topic, pos, neg in self.source.iter()
         )
@@ -428,7 +536,7 @@ class PairwiseDatasetTripletBasedSampler(PairwiseSampler):
             def __init__(
                 self,
                 iterator: SerializableIterator[PairwiseSample],
-                random: np.random.RandomState,
+                random: np.random.Generator,
                 negative_algo: str,
                 documents: DocumentStore,
             ):
@@ -446,21 +554,21 @@ class PairwiseDatasetTripletBasedSampler(PairwiseSampler):
                     or self.negative_algo == "random"
                 )
 
-                pos = sample.positives[self.random.randint(len(sample.positives))]
-                qry = sample.topics[self.random.randint(len(sample.topics))]
+                pos = sample.positives[self.random.integers(len(sample.positives))]
+                qry = sample.topics[self.random.integers(len(sample.topics))]
 
                 if self.negative_algo == "random":
                     # choose the random negatives
                     while True:
                         neg_id = self.documents.docid_internal2external(
-                            self.random.randint(0, self.documents.documentcount)
+                            self.random.integers(0, self.documents.documentcount)
                         )
                         if neg_id != pos.id:
                             break
                     neg = create_record(id=neg_id)
                 else:
                     negatives = sample.negatives[self.negative_algo]
-                    neg = negatives[self.random.randint(len(negatives))]
+                    neg = negatives[self.random.integers(len(negatives))]
 
                 return PairwiseRecord(
                     qry.as_record(), DocumentRecord(pos), DocumentRecord(neg)
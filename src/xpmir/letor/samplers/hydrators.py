@@ -133,7 +133,7 @@ class PairwiseTransformAdapter(PairwiseSampler):
     adapter: Param[SampleTransform]
     """The transformation"""
 
-    def initialize(self, random: Optional[np.random.RandomState] = None):
+    def initialize(self, random: Optional[np.random.Generator] = None):
         super().initialize(random)
         self.sampler.initialize(random)
 
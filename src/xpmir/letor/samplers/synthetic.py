@@ -164,7 +164,7 @@ class JSONLNegativeGeneration(Task):
 
                 negatives = {}
                 state = (
-                    np.random.RandomState()
+                    np.random.default_rng()
                     if self.random is None
                     else self.random.state
                 )
@@ -172,7 +172,7 @@ class JSONLNegativeGeneration(Task):
                 # Retrieve based on the algo
                 # TODO: Make it in batch
                 for (algo_name, retriever) in self.retrievers.items():
-                    query_text = query_texts[state.randint(len(query_texts))]
+                    query_text = query_texts[state.integers(len(query_texts))]
                     scoreddocuments = retriever.retrieve(query_text)
                     ext_ids = [sd.document.id for sd in scoreddocuments]
                     filitered = [
@@ -37,7 +37,7 @@ class LossTrainer(Trainer):
 
     def initialize(
         self,
-        random: np.random.RandomState,
+        random: np.random.Generator,
         context: TrainerContext,
     ):
         super().initialize(random, context)
@@ -78,14 +78,14 @@ class LossTrainer(Trainer):
                 total_loss += loss.weight * loss.value
                 names.append(loss.name)
                 self.context.add_metric(
-                    ScalarMetric(f"{loss.name}", float(loss.value.item()), nrecords)
+                    ScalarMetric(f"{loss.name}", loss.value.detach(), nrecords)
                 )
 
             # Reports the main metric
             if len(names) > 1:
                 names.sort()
                 self.context.add_metric(
-                    ScalarMetric("+".join(names), float(total_loss.item()), nrecords)
+                    ScalarMetric("+".join(names), total_loss.detach(), nrecords)
                 )
 
             self.context.state.optimizer.scale(total_loss).backward()
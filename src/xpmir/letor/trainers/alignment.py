@@ -87,7 +87,7 @@ class AlignmentTrainer(LossTrainer):
 
     def initialize(
         self,
-        random: np.random.RandomState,
+        random: np.random.Generator,
         context: TrainerContext,
     ):
         super().initialize(random, context)
@@ -84,7 +84,7 @@ class BatchwiseTrainer(LossTrainer):
     @initializer
     def initialize(
         self,
-        random: np.random.RandomState,
+        random: np.random.Generator,
         context: TrainerContext,
     ):
         super().initialize(random, context)
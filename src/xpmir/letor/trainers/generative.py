@@ -38,7 +38,7 @@ class GenerativeTrainer(LossTrainer):
     sampler: Param[PairwiseSampler]
     """The pairwise sampler"""
 
-    def initialize(self, random: np.random.RandomState, context: TrainerContext):
+    def initialize(self, random: np.random.Generator, context: TrainerContext):
         super().initialize(random, context)
         self.loss.initialize()
         foreach(
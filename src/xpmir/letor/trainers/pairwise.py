@@ -1,12 +1,12 @@
 from dataclasses import InitVar
 import math
 import sys
-from typing import Iterator, Any
+from typing import Any
 import torch
 from torch import nn
 from torch.functional import Tensor
 import torch.nn.functional as F
-from experimaestro import Config, Param
+from experimaestro import Config, Meta, Param
 from xpmir.learning.context import Loss
 from xpmir.learning.metrics import ScalarMetric
 from xpmir.letor.records import (
@@ -20,7 +20,12 @@ from xpmir.letor.trainers import TrainerContext, LossTrainer
 import numpy as np
 from xpmir.rankers import LearnableScorer, ScorerOutputType
 from xpmir.utils.utils import foreach
-from xpmir.utils.iter import MultiprocessSerializableIterator
+from xpmir.utils.iter import (
+    MultiprocessSerializableIterator,
+    RandomizedSerializableIteratorState,
+    get_random_state,
+    set_random_state,
+)
 from xpmir.utils.utils import EasyLogger
 from xpmir.learning.losses import bce_with_logits_loss
 
@@ -34,6 +39,19 @@ class PairwiseLoss(Config, nn.Module):
     """The weight :math:`w` with which the loss is multiplied (useful when
     combining with other ones)"""
 
+    torch_compile: Meta[bool] = False
+    """Compile the loss computation with :py:func:`torch.compile` (fusing its
+    kernels)"""
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.torch_compile:
+            self._compile()
+
+    def _compile(self):
+        """Compiles the loss computation (called once, if `torch_compile`)"""
+        self.compute = torch.compile(self.compute, dynamic=True)
+
     def initialize(self, ranker: LearnableScorer):
         pass
 
@@ -70,14 +88,27 @@ class CrossEntropyLoss(PairwiseLoss):
     """
     NAME = "cross-entropy"
 
-    def compute(self, rel_scores_by_record, info: TrainerContext):
-        target = (
-            torch.zeros(rel_scores_by_record.shape[0])
-            .long()
-            .to(rel_scores_by_record.device)
-        )
+    _target = None
+    """Cached (all zero) targets"""
+
+    def _compile(self):
+        # Only the loss is compiled, since the targets buffer can be replaced
+        self._loss = torch.compile(self._loss, dynamic=True)
+
+    def _loss(self, rel_scores_by_record, target):
         return F.cross_entropy(rel_scores_by_record, target, reduction="mean")
 
+    def compute(self, rel_scores_by_record, info: TrainerContext):
+        # The (all zero) targets are views of a cached device tensor
+        size, device = rel_scores_by_record.shape[0], rel_scores_by_record.device
+        if (
+            self._target is None
+            or len(self._target) < size
+            or self._target.device != device
+        ):
+            self._target = torch.zeros(max(size, 1024), dtype=torch.long, device=device)
+        return self._loss(rel_scores_by_record, self._target[:size])
+
 
 class HingeLoss(PairwiseLoss):
     r"""Hinge (or max-margin) loss
@@ -154,12 +185,24 @@ class PairwiseTrainer(LossTrainer):
 
     sampler_iter: InitVar[SerializableIterator[PairwiseRecord, Any]]
 
+    check_finite_every: Meta[int] = 50
+    """Check that the scores are finite (no nan or inf) every N batches – each
+    check synchronizes with the device"""
+
+    _finite = None
+    """Whether all the scores since the last check are finite (on device)"""
+
+    _unchecked_batches = 0
+    """Number of batches since the last check"""
+
     def initialize(
         self,
-        random: np.random.RandomState,
+        random: np.random.Generator,
         context: TrainerContext,
     ):
         super().initialize(random, context)
+        self._finite = None
+        self._unchecked_batches = 0
         self.lossfn.initialize(self.ranker)
         foreach(context.hooks(PairwiseLoss), lambda loss: loss.initialize(self.ranker))
         self.sampler.initialize(random)
@@ -170,26 +213,34 @@ class PairwiseTrainer(LossTrainer):
     def train_batch(self, records: PairwiseRecords):
         # Get the next batch and compute the scores for each query/document
         rel_scores = self.ranker(records, self.context)
-
-        if torch.isnan(rel_scores).any() or torch.isinf(rel_scores).any():
-            self.logger.error("nan or inf relevance score detected. Aborting.")
-            sys.exit(1)
+        self.check_finite(rel_scores)
 
         # Reshape to get the pairs and compute the loss
         pairwise_scores = rel_scores.reshape(2, len(records)).T
         self.lossfn.process(pairwise_scores, self.context)
 
         self.context.add_metric(
-            ScalarMetric(
-                "accuracy", float(self.acc(pairwise_scores).item()), len(rel_scores)
-            )
+            ScalarMetric("accuracy", self.acc(pairwise_scores), len(rel_scores))
         )
 
+    def check_finite(self, scores: Tensor):
+        """Accumulates (on device) whether the scores are finite, and aborts if
+        not when checking"""
+        with torch.no_grad():
+            finite = torch.isfinite(scores).all()
+        self._finite = finite if self._finite is None else self._finite & finite
+
+        self._unchecked_batches += 1
+        if self._unchecked_batches >= self.check_finite_every:
+            if not self._finite.item():
+                self.logger.error("nan or inf relevance score detected. Aborting.")
+                sys.exit(1)
+            self._finite = None
+            self._unchecked_batches = 0
+
     def acc(self, scores_by_record) -> Tensor:
         with torch.no_grad():
-            return (
-                scores_by_record[:, 0] > scores_by_record[:, 1]
-            ).sum().float() / len(scores_by_record)
+            return (scores_by_record[:, 0] > scores_by_record[:, 1]).float().mean()
 
 
 class PairwiseLossWithTarget(Config):
@@ -218,6 +269,49 @@ class PairwiseLossWithTarget(PairwiseLossWithTarget):
         return self.loss(scores, targets)
 
 
+class PairwiseTargetsIterator(
+    SerializableIterator[
+        PairwiseRecordsWithTarget, RandomizedSerializableIteratorState[Any]
+    ]
+):
+    """Randomly swaps the documents of pairwise records, with a target set to 1
+    when the first document is the positive one
+
+    The random state is part of the iterator state, so that swaps are the
+    same when resuming training."""
+
+    def __init__(
+        self,
+        iterator: SerializableIterator[PairwiseRecords, Any],
+        random: np.random.Generator,
+    ):
+        self.iterator = iterator
+        self.random = random
+
+    def state_dict(self) -> RandomizedSerializableIteratorState[Any]:
+        return {
+            "random": get_random_state(self.random),
+            "state": self.iterator.state_dict(),
+        }
+
+    def load_state_dict(self, state: RandomizedSerializableIteratorState[Any]):
+        set_random_state(self.random, state["random"])
+        self.iterator.load_state_dict(state["state"])
+
+    def __next__(self) -> PairwiseRecordsWithTarget:
+        records = next(self.iterator)
+        batch = PairwiseRecordsWithTarget()
+        for query, positive, negative in zip(
+            records.unique_topics, records.positives, records.negatives
+        ):
+            # randomly swap the first and second document
+            if self.random.random() < 0.5:
+                batch.add(PairwiseRecordWithTarget(query, positive, negative, 1))
+            else:
+                batch.add(PairwiseRecordWithTarget(query, negative, positive, 0))
+        return batch
+
+
 class DuoPairwiseTrainer(LossTrainer):
     """The pairwise trainer for duobert. The iter_batch method
     can be the same as the pairwiseTrainer
@@ -231,7 +325,7 @@ class DuoPairwiseTrainer(LossTrainer):
 
     sampler_iter: InitVar[SerializableIterator[PairwiseRecord, Any]]
 
-    def initialize(self, random: np.random.RandomState, context: TrainerContext):
+    def initialize(self, random: np.random.Generator, context: TrainerContext):
         super().initialize(random, context)
         self.lossfn.initialize(self.ranker)
 
@@ -242,26 +336,13 @@ class DuoPairwiseTrainer(LossTrainer):
         }[self.ranker.outputType]
         foreach(context.hooks(PairwiseLoss), lambda loss: loss.initialize(self.ranker))
         self.sampler.initialize(random)
-        self.sampler_iter = self.sampler.pairwise_iter()
-
-    def iter_batches(self) -> Iterator[PairwiseRecordsWithTarget]:
-        while True:
-            batch = PairwiseRecordsWithTarget()
-            for _, record in zip(range(self.batch_size), self.sampler_iter):
-                # randomly swap the first and second document
-                if self.random.random() < 0.5:
-                    batch.add(
-                        PairwiseRecordWithTarget(
-                            record.query, record.positive, record.negative, 1
-                        )
-                    )
-                else:
-                    batch.add(
-                        PairwiseRecordWithTarget(
-                            record.query, record.negative, record.positive, 0
-                        )
-                    )
-            yield batch
+
+        # Batches are built (and documents swapped) in a separate process
+        self.sampler_iter = MultiprocessSerializableIterator(
+            PairwiseTargetsIterator(
+                self.sampler.pairwise_batch_iter(self.batch_size), self.random
+            )
+        )
 
     def train_batch(self, records: PairwiseRecords):
         # Get the next batch and compute the scores for each query/document
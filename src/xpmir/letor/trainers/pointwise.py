@@ -66,7 +66,7 @@ class PointwiseTrainer(LossTrainer):
 
     sampler_iter: InitVar[SerializableIterator[PointwiseRecord, Any]]
 
-    def initialize(self, random: np.random.RandomState, context):
+    def initialize(self, random: np.random.Generator, context):
         super().initialize(random, context)
 
         self.sampler.initialize(self.random)
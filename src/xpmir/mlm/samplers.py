@@ -30,19 +30,19 @@ class MLMSampler(Sampler):
 
     _stores: List[DocumentStore]
 
-    def initialize(self, random: Optional[np.random.RandomState]):
+    def initialize(self, random: Optional[np.random.Generator]):
         super().initialize(random)
 
     def record_iter(self) -> RandomSerializableIterator[DocumentRecord]:
-        def iter(random: np.random.RandomState):
+        def iter(random: np.random.Generator):
             while True:
                 # We could imagine setting weights here to give more importance
                 # to one dataset
                 document_count = [dataset.documentcount for dataset in self.datasets]
-                choice = random.randint(0, len(self.datasets))
+                choice = random.integers(0, len(self.datasets))
                 if document_count[choice] < 10_000_000:
                     document = self.datasets[choice].document_int(
-                        self.random.randint(0, self.datasets[choice].documentcount)
+                        self.random.integers(0, self.datasets[choice].documentcount)
                     )
                     yield document
                 else:
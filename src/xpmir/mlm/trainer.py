@@ -55,7 +55,7 @@ class MLMTrainer(LossTrainer):
 
     def initialize(
         self,
-        random: np.random.RandomState,
+        random: np.random.Generator,
         context: TrainerContext,
     ):
         super().initialize(random, context)
@@ -1,6 +1,15 @@
 from abc import abstractmethod
 import itertools
-from typing import Iterable, Union, List, Optional, TypeVar, Generic, Sequence
+from typing import (
+    Iterable,
+    Union,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Generic,
+    Sequence,
+)
 import torch
 from datamaestro_text.data.ir import TextItem
 from xpmir.learning.context import TrainerContext
@@ -21,8 +30,9 @@ class DualRepresentationScorer(LearnableScorer, Generic[QueriesRep, DocsRep]):
 
     def forward(self, inputs: BaseRecords, info: Optional[TrainerContext] = None):
         # Forward to model
-        enc_queries = self.encode_queries(list(inputs.unique_queries))
-        enc_documents = self.encode_documents(list(inputs.unique_documents))
+        enc_queries, enc_documents = self.encode_queries_documents(
+            list(inputs.unique_queries), list(inputs.unique_documents)
+        )
 
         # Score product
         if isinstance(inputs, ProductRecords):
@@ -51,6 +61,14 @@ class DualRepresentationScorer(LearnableScorer, Generic[QueriesRep, DocsRep]):
         The return value is model dependent"""
         raise NotImplementedError()
 
+    def encode_queries_documents(
+        self, queries: List[TopicRecord], documents: List[DocumentRecord]
+    ) -> Tuple[QueriesRep, DocsRep]:
+        """Encode both queries and documents
+
+        By default, uses `encode_queries` and `encode_documents`"""
+        return self.encode_queries(queries), self.encode_documents(documents)
+
     def encode_documents(self, records: Iterable[DocumentRecord]) -> DocsRep:
         """Encode a list of texts (document or query)
 
@@ -2,10 +2,11 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 from attrs import evolve
 import torch
-from experimaestro import Param
+import torch.nn.functional as F
+from experimaestro import Meta, Param
 from xpmir.letor.records import TopicRecord, DocumentRecord
 from xpmir.neural import DualRepresentationScorer, QueriesRep, DocsRep
-from xpmir.utils.utils import easylog, foreach
+from xpmir.utils.utils import easylog
 from xpmir.text.encoders import TextEncoderBase
 from xpmir.learning.context import Loss, TrainerContext, TrainingHook
 from xpmir.learning.metrics import ScalarMetric
@@ -103,34 +104,22 @@ class Dense(DualVectorScorer[QueriesRep, DocsRep]):
         scores = queries.value @ documents.value.T
 
         if info is not None:
-            foreach(
-                info.hooks(DualVectorListener),
-                lambda hook: hook(info, queries, documents),
-            )
-            foreach(
-                info.hooks(DualVectorScorerListener),
-                lambda hook: hook(info, queries, documents, scores),
-            )
+            for hook in info.hooks(DualVectorListener):
+                hook(info, queries, documents)
+            for hook in info.hooks(DualVectorScorerListener):
+                hook(info, queries, documents, scores)
 
         return scores
 
     def score_pairs(self, queries, documents, info: Optional[TrainerContext] = None):
-        scores = (
-            (queries.value.unsqueeze(1) @ documents.value.unsqueeze(2))
-            .squeeze(-1)
-            .squeeze(-1)
-        )
+        scores = torch.einsum("bd,bd->b", queries.value, documents.value)
 
         # Apply the dual vector hook
         if info is not None:
-            foreach(
-                info.hooks(DualVectorListener),
-                lambda hook: hook(info, queries, documents),
-            )
-            foreach(
-                info.hooks(DualVectorScorerListener),
-                lambda hook: hook(info, queries, documents, scores),
-            )
+            for hook in info.hooks(DualVectorListener):
+                hook(info, queries, documents)
+            for hook in info.hooks(DualVectorScorerListener):
+                hook(info, queries, documents, scores)
         return scores
 
     @classmethod
@@ -153,25 +142,34 @@ class CosineDense(Dense):
 
     def encode_queries(self, records: List[TopicRecord]):
         queries = (self.query_encoder or self.encoder)(records)
-        return evolve(
-            queries, value=queries.value / queries.value.norm(dim=-1, keepdim=True)
-        )
+        return evolve(queries, value=F.normalize(queries.value, dim=-1))
 
     def encode_documents(self, records: List[DocumentRecord]):
         documents = self.encoder(records)
-        return evolve(
-            documents,
-            value=documents.value / documents.value.norm(dim=-1, keepdim=True),
-        )
+        return evolve(documents, value=F.normalize(documents.value, dim=-1))
 
 
 class DotDense(Dense):
     """Dual model based on inner product."""
 
+    joint_encoding: Meta[bool] = False
+    """If queries and documents are encoded by the same encoder, encode them
+    with a single forward pass (queries are then padded to the length of
+    documents)"""
+
     def __validate__(self):
         super().__validate__()
         assert not self.encoder.static(), "The vocabulary should be learnable"
 
+    def encode_queries_documents(
+        self, queries: List[TopicRecord], documents: List[DocumentRecord]
+    ):
+        if not self.joint_encoding or self._query_encoder is not self.encoder:
+            return super().encode_queries_documents(queries, documents)
+
+        encoded = self.encoder(queries + documents)
+        return encoded[: len(queries)], encoded[len(queries) :]
+
     def encode_queries(self, records: List[TopicRecord]):
         """Encode the different queries"""
         return self._query_encoder(records)
@@ -199,6 +197,15 @@ class FlopsRegularizer(DualVectorListener):
     lambda_d: Param[float]
     """Lambda for documents"""
 
+    torch_compile: Meta[bool] = False
+    """Compile the regularization computation with :py:func:`torch.compile`"""
+
+    def __post_init__(self):
+        super().__post_init__()
+        self._compute = FlopsRegularizer.compute
+        if self.torch_compile:
+            self._compute = torch.compile(FlopsRegularizer.compute, dynamic=True)
+
     def compute(x: torch.Tensor):
         """
         :param x: term vectors (batch size x vocabulary dimension)
@@ -208,7 +215,7 @@ class FlopsRegularizer(DualVectorListener):
         y = x.mean(0)
 
         # Returns the sum of squared means
-        return y, (y * y).sum()
+        return y, y @ y
 
     def __call__(self, info: TrainerContext, queries, documents):
         # queries and documents are length x dimension
@@ -219,34 +226,31 @@ class FlopsRegularizer(DualVectorListener):
         documents = documents.value
 
         # q of shape (dimension), flops_q of shape (1)
-        q, flops_q = FlopsRegularizer.compute(queries)
-        d, flops_d = FlopsRegularizer.compute(documents)
+        q, flops_q = self._compute(queries)
+        d, flops_d = self._compute(documents)
 
         flops = self.lambda_d * flops_d + self.lambda_q * flops_q
         info.add_loss(Loss("flops", flops, 1.0))
 
-        info.metrics.add(ScalarMetric("flops", flops.item(), 1))
-        info.metrics.add(ScalarMetric("flops_q", flops_q.item(), 1))
-        info.metrics.add(ScalarMetric("flops_d", flops_d.item(), 1))
-
+        # Uses float32, since float64 is not supported by all devices (e.g. MPS)
         with torch.no_grad():
-            info.metrics.add(
-                ScalarMetric(
-                    "sparsity_q",
-                    torch.count_nonzero(queries).item()
-                    / (queries.shape[0] * queries.shape[1]),
-                    len(q),
-                )
-            )
-            info.metrics.add(
-                ScalarMetric(
-                    "sparsity_d",
-                    torch.count_nonzero(documents).item()
-                    / (documents.shape[0] * documents.shape[1]),
-                    len(d),
-                )
+            stats = torch.stack(
+                [
+                    flops.float(),
+                    flops_q.float(),
+                    flops_d.float(),
+                    torch.count_nonzero(queries).float() / queries.numel(),
+                    torch.count_nonzero(documents).float() / documents.numel(),
+                ]
             )
 
+        # Metrics are kept on the device (no synchronization)
+        info.metrics.add(ScalarMetric("flops", stats[0], 1))
+        info.metrics.add(ScalarMetric("flops_q", stats[1], 1))
+        info.metrics.add(ScalarMetric("flops_d", stats[2], 1))
+        info.metrics.add(ScalarMetric("sparsity_q", stats[3], len(q)))
+        info.metrics.add(ScalarMetric("sparsity_d", stats[4], len(d)))
+
 
 class ScheduledFlopsRegularizer(FlopsRegularizer):
     """
@@ -271,6 +275,7 @@ class ScheduledFlopsRegularizer(FlopsRegularizer):
             return (step / self.lambda_warmup_steps) ** 2
 
     def __post_init__(self):
+        super().__post_init__()
         self.initial_lambda_q = self.lambda_q
         self.initial_lambda_d = self.lambda_d
 
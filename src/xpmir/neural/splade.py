@@ -1,8 +1,10 @@
+import contextlib
 from typing import List, Optional, Generic
-from experimaestro import Config, Param
+from experimaestro import Config, Meta, Param
 from datamaestro_text.data.ir import TextItem
 import torch.nn as nn
 import torch
+from torch.utils.checkpoint import checkpoint
 from xpmir.learning import ModuleInitOptions
 from xpmir.distributed import DistributableModel
 from xpmir.text.huggingface import (
@@ -24,33 +26,91 @@ from xpmir.utils.utils import easylog
 logger = easylog()
 
 
+def _prune(values: torch.Tensor, top_k: Optional[int]) -> torch.Tensor:
+    """Only keeps the top-k values of each (batch x vocabulary) row"""
+    if top_k is None or top_k >= values.shape[-1]:
+        return values
+    top_values, indices = values.topk(top_k, dim=-1)
+    return torch.zeros_like(values).scatter(-1, indices, top_values)
+
+
+def _device(module: nn.Module) -> torch.device:
+    return next(module.parameters()).device
+
+
+def _autocast(amp_dtype: Optional[str], device: torch.device):
+    """Returns an autocast context for the given data type (or a null context
+    if not set)"""
+    if amp_dtype is None:
+        return contextlib.nullcontext()
+    return torch.autocast(device.type, dtype=getattr(torch, amp_dtype))
+
+
 class Aggregation(Config):
     """The aggregation function for Splade"""
 
     def get_output_module(self, linear: nn.Module) -> nn.Module:
         return AggregationModule(linear, self)
 
+    def project(self, linear: nn.Module, input: torch.Tensor, mask: torch.Tensor):
+        """Projects the token representations onto the vocabulary, and
+        aggregates them"""
+        return self(linear(input), mask)
+
 
 class MaxAggregation(Aggregation):
     """Aggregate using a max"""
 
+    chunk_size: Meta[Optional[int]] = None
+    """If set, the vocabulary projection is computed by chunks of tokens while
+    keeping a running maximum, so that the batch x length x vocabulary logits
+    are never fully materialized – when computing gradients, the logits of
+    each chunk are recomputed in the backward pass (only used with
+    SpladeTextEncoderV2)"""
+
     def __call__(self, logits, mask):
-        # Get the maximum (masking the values)
-        values, _ = torch.max(
-            torch.relu(logits) * mask.to(logits.device).unsqueeze(-1),
-            dim=1,
-        )
+        # Get the maximum (masking the values) – since ReLU and log(1+x) are
+        # monotonous, they are only applied to the maxima
+        mask = mask.to(logits.device, dtype=torch.bool).unsqueeze(-1)
+        values = logits.masked_fill(~mask, float("-inf")).amax(dim=1)
 
         # Computes log(1+x)
-        return torch.log1p(values.clamp(min=0))
+        return torch.log1p(torch.relu(values))
+
+    @staticmethod
+    def _chunk_max(linear: nn.Module, input: torch.Tensor, mask: torch.Tensor):
+        return linear(input).masked_fill(~mask, float("-inf")).amax(dim=1)
+
+    def project(self, linear: nn.Module, input: torch.Tensor, mask: torch.Tensor):
+        if self.chunk_size is None:
+            return super().project(linear, input, mask)
+
+        mask = mask.to(input.device, dtype=torch.bool).unsqueeze(-1)
+        values = None
+        for start in range(0, input.shape[1], self.chunk_size):
+            end = start + self.chunk_size
+            chunk = (linear, input[:, start:end], mask[:, start:end])
+            if torch.is_grad_enabled():
+                # Otherwise, the chunk logits would be saved for the backward
+                chunk_values = checkpoint(
+                    MaxAggregation._chunk_max, *chunk, use_reentrant=False
+                )
+            else:
+                chunk_values = MaxAggregation._chunk_max(*chunk)
+            values = (
+                chunk_values if values is None else torch.maximum(values, chunk_values)
+            )
+
+        return torch.log1p(torch.relu(values))
 
 
 class SumAggregation(Aggregation):
     """Aggregate using a sum"""
 
     def __call__(self, logits, mask):
+        mask = mask.to(logits.device, dtype=torch.bool).unsqueeze(-1)
         return torch.sum(
-            torch.log1p(torch.relu(logits) * mask.to(logits.device).unsqueeze(-1)),
+            torch.log1p(torch.where(mask, torch.relu(logits), 0.0)),
             dim=1,
         )
 
@@ -62,7 +122,7 @@ class AggregationModule(nn.Module):
         self.aggregation = aggregation
 
     def forward(self, input: torch.Tensor, mask: torch.Tensor):
-        return self.aggregation(self.linear(input), mask)
+        return self.aggregation.project(self.linear, input, mask)
 
 
 class SpladeTextEncoderModel(nn.Module):
@@ -99,6 +159,27 @@ class SpladeTextEncoder(TextEncoder, DistributableModel):
     maxlen: Param[Optional[int]] = None
     """Max length for texts"""
 
+    top_k: Param[Optional[int]] = None
+    """If set, only the top-k weights of each text representation are kept
+    (which gives smaller sparse indices and faster retrieval)"""
+
+    amp_dtype: Meta[Optional[str]] = None
+    """If set (`float16` or `bfloat16`), the encoder runs with mixed precision
+    (this halves the size of the batch x length x vocabulary logits), and the
+    output is converted back to float32"""
+
+    gradient_checkpointing: Meta[bool] = False
+    """When computing gradients, recompute the encoder and aggregation outputs
+    in the backward pass instead of storing them (saves memory)"""
+
+    def __validate__(self):
+        assert self.amp_dtype in (
+            None,
+            "float16",
+            "bfloat16",
+        ), f"Unsupported mixed precision data type {self.amp_dtype}"
+        return super().__validate__()
+
     def __initialize__(self, options: ModuleInitOptions):
         self.encoder.initialize(options)
         self.model = SpladeTextEncoderModel(self.encoder, self.aggregation)
@@ -108,8 +189,19 @@ class SpladeTextEncoder(TextEncoder, DistributableModel):
         if not isinstance(texts[0], str):
             texts = [text[TextItem].text for text in texts]
         tokenized = self.encoder.batch_tokenize(texts, mask=True, maxlen=self.maxlen)
-        out = self.model(tokenized)
-        return TextsRepresentationOutput(out, tokenized)
+
+        # Moves the tokenized texts (and their mask) to the device once
+        device = _device(self)
+        tokenized = tokenized.to(device)
+
+        with _autocast(self.amp_dtype, device):
+            if self.gradient_checkpointing and torch.is_grad_enabled():
+                out = checkpoint(self.model, tokenized, use_reentrant=False)
+            else:
+                out = self.model(tokenized)
+        if self.amp_dtype is not None:
+            out = out.float()
+        return TextsRepresentationOutput(_prune(out, self.top_k), tokenized)
 
     @property
     def dimension(self):
@@ -156,6 +248,32 @@ class SpladeTextEncoderV2(
     maxlen: Param[Optional[int]] = None
     """Max length for texts"""
 
+    top_k: Param[Optional[int]] = None
+    """If set, only the top-k weights of each text representation are kept
+    (which gives smaller sparse indices and faster retrieval)"""
+
+    amp_dtype: Meta[Optional[str]] = None
+    """If set (`float16` or `bfloat16`), the encoder runs with mixed precision
+    (this halves the size of the batch x length x vocabulary logits), and the
+    output is converted back to float32"""
+
+    gradient_checkpointing: Meta[bool] = False
+    """When computing gradients, recompute the vocabulary projection and its
+    aggregation in the backward pass, instead of storing the batch x length x
+    vocabulary logits"""
+
+    pin_memory: Meta[bool] = False
+    """Tokenize texts into pinned memory (when using CUDA), so that they are
+    asynchronously copied to the GPU"""
+
+    def __validate__(self):
+        assert self.amp_dtype in (
+            None,
+            "float16",
+            "bfloat16",
+        ), f"Unsupported mixed precision data type {self.amp_dtype}"
+        return super().__validate__()
+
     def __initialize__(self, options: ModuleInitOptions):
         self.encoder.initialize(options)
         self.tokenizer.initialize(options)
@@ -173,11 +291,24 @@ class SpladeTextEncoderV2(
     def forward(self, texts: EncoderInputType) -> TextsRepresentationOutput:
         """Returns a batch x vocab tensor"""
         tokenized = self.tokenizer.tokenize(
-            texts, options=TokenizerOptions(self.maxlen)
+            texts, options=TokenizerOptions(self.maxlen, pin_memory=self.pin_memory)
         )
 
-        value = self.aggregation(self.encoder(tokenized).logits, tokenized.mask)
-        return TextsRepresentationOutput(value, tokenized)
+        # Moves the tokenized texts (and their mask) to the device once
+        device = _device(self)
+        tokenized = tokenized.to(device)
+
+        with _autocast(self.amp_dtype, device):
+            hidden = self.encoder(tokenized).logits
+            if self.gradient_checkpointing and torch.is_grad_enabled():
+                value = checkpoint(
+                    self.aggregation, hidden, tokenized.mask, use_reentrant=False
+                )
+            else:
+                value = self.aggregation(hidden, tokenized.mask)
+        if self.amp_dtype is not None:
+            value = value.float()
+        return TextsRepresentationOutput(_prune(value, self.top_k), tokenized)
 
     @property
     def dimension(self):
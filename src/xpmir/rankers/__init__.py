@@ -37,8 +37,12 @@ from xpmir.letor.records import (
     BaseRecords,
     PairwiseRecord,
     PairwiseRecords,
+    PointwiseRecord,
+    PointwiseRecords,
     ProductRecords,
 )
+from xpmir.utils.functools import config_cache
+from xpmir.utils.iter import threaded_prefetch
 from xpmir.utils.utils import EasyLogger, easylog
 
 if TYPE_CHECKING:
@@ -133,6 +137,7 @@ class Scorer(Config, Initializable, EasyLogger, ABC):
         batcher: Batcher = Batcher.C(),
         top_k=None,
         device=None,
+        batch_topics=False,
     ):
         """Returns a two stage re-ranker from this retriever and a scorer
 
@@ -141,6 +146,9 @@ class Scorer(Config, Initializable, EasyLogger, ABC):
         :param batch_size: The number of documents in each batch
 
         :param top_k: Number of documents to re-rank (or None for all)
+
+        :param batch_topics: Batches contain (topic, document) pairs from
+            different topics when retrieving for a set of topics
         """
         return TwoStageRetriever.C(
             retriever=retriever,
@@ -149,9 +157,11 @@ class Scorer(Config, Initializable, EasyLogger, ABC):
             batcher=batcher,
             device=device,
             top_k=top_k if top_k else None,
+            batch_topics=batch_topics,
         )
 
 
+@config_cache
 def scorer_retriever(
     documents: Documents,
     *,
@@ -165,7 +175,8 @@ def scorer_retriever(
     :param documents: The document collection
     :param retrievers: A retriever factory
     :param scorer: The scorer
-    :return: A retriever, calling the :meth:scorer.getRetriever
+    :return: A retriever, calling the :meth:scorer.getRetriever (the same
+        retriever is returned for identical arguments)
     """
     assert retrievers is not None, "The retrievers have not been given"
     assert scorer is not None, "The scorer has not been given"
@@ -226,7 +237,7 @@ class AbstractModuleScorer(Scorer, Module):
         """
         # Sets the current random seed
         if options.random is not None:
-            seed = options.random.randint((2**32) - 1)
+            seed = options.random.integers((2**32) - 1)
             torch.manual_seed(seed)
             torch.cuda.manual_seed_all(seed)
 
@@ -363,6 +374,22 @@ class TwoStageRetriever(AbstractTwoStageRetriever):
     """Use on retriever to select the top-K documents which are the re-ranked
     given a scorer"""
 
+    batch_topics: Meta[bool] = False
+    """When retrieving for a set of topics, batches (of size `batchsize`) can
+    contain (topic, document) pairs from different topics, which reduces the
+    number of (partially filled) batches. The scorer should be a
+    :py:class:`LearnableScorer` that can process pointwise records."""
+
+    use_fp16: Meta[bool] = False
+    """Use mixed precision (float16) when scoring a set of topics (with
+    `batch_topics`) on a CUDA device (ignored otherwise)"""
+
+    prefetch: Meta[int] = 0
+    """When retrieving for a set of topics, the base retriever results are
+    computed by a background thread for (at most) this number of topics in
+    advance, so that the first stage retrieval overlaps with the scoring (0 to
+    disable)"""
+
     def _retrieve(
         self,
         batch: List[ScoredDocument],
@@ -373,8 +400,9 @@ class TwoStageRetriever(AbstractTwoStageRetriever):
 
     def retrieve(self, record: TopicRecord):
         # Calls the retriever
-        scoredDocuments = self.retriever.retrieve(record)
+        return self._rerank(record, self.retriever.retrieve(record))
 
+    def _rerank(self, record: TopicRecord, scoredDocuments: List[ScoredDocument]):
         # Scorer in evaluation mode
         self.scorer.eval()
 
@@ -386,6 +414,89 @@ class TwoStageRetriever(AbstractTwoStageRetriever):
         _scoredDocuments.sort(reverse=True)
         return _scoredDocuments[: (self.top_k or len(_scoredDocuments))]
 
+    def _score_pairs(
+        self,
+        batch: List[Tuple[str, TopicRecord, ScoredDocument]],
+        scores: List[float],
+    ):
+        inputs = PointwiseRecords()
+        for _, topic, scored_document in batch:
+            inputs.add(PointwiseRecord(topic, scored_document.document))
+
+        device_type = self.device.value.type if self.device is not None else "cpu"
+        with torch.inference_mode():
+            with torch.autocast(
+                device_type,
+                dtype=torch.float16,
+                enabled=self.use_fp16 and device_type == "cuda",
+            ):
+                scores.extend(self.scorer(inputs, None).cpu().tolist())
+
+    def _score_buffer(
+        self,
+        pairs: List[Tuple[str, TopicRecord, ScoredDocument]],
+        results: Dict[str, List[ScoredDocument]],
+        remaining: Dict[str, int],
+    ):
+        """Scores (topic, document) pairs, and keeps the top-k documents of
+        the topics whose pairs have all been scored"""
+        scores = []
+        self._batcher.process(pairs, self._score_pairs, scores)
+
+        for (key, _, scored_document), score in zip(pairs, scores):
+            results[key].append(ScoredDocument(scored_document.document, score))
+            remaining[key] -= 1
+            if remaining[key] == 0:
+                del remaining[key]
+                scored_documents = results[key]
+                scored_documents.sort(reverse=True)
+                results[key] = scored_documents[: (self.top_k or len(scored_documents))]
+
+    def retrieve_all(
+        self, queries: Dict[str, TopicRecord]
+    ) -> Dict[str, List[ScoredDocument]]:
+        if not self.batch_topics and self.prefetch <= 0:
+            return super().retrieve_all(queries)
+
+        candidates = (
+            (key, record, self.retriever.retrieve(record))
+            for key, record in queries.items()
+        )
+        if self.prefetch > 0:
+            candidates = threaded_prefetch(candidates, self.prefetch)
+
+        if not self.batch_topics:
+            return {
+                key: self._rerank(record, scored_documents)
+                for key, record, scored_documents in tqdm(
+                    candidates, total=len(queries)
+                )
+            }
+
+        # Streams the (topic, document) pairs of successive topics, and scores
+        # them by batches of `batchsize` pairs (or topic by topic if not set)
+        self.scorer.eval()
+        results = {}
+        remaining = {}
+        buffer = []
+        for key, record, scored_documents in tqdm(candidates, total=len(queries)):
+            results[key] = []
+            if not scored_documents:
+                continue
+
+            remaining[key] = len(scored_documents)
+            buffer.extend((key, record, sd) for sd in scored_documents)
+
+            batchsize = self.batchsize or len(buffer)
+            while len(buffer) >= batchsize:
+                self._score_buffer(buffer[:batchsize], results, remaining)
+                del buffer[:batchsize]
+
+        if buffer:
+            self._score_buffer(buffer, results, remaining)
+
+        return results
+
 
 class DuoTwoStageRetriever(AbstractTwoStageRetriever):
     """The two stage retriever for pairwise scorers.
@@ -1,6 +1,8 @@
 import torch
+import torch.nn.functional as F
 from torch.autograd import gradcheck
 from xpmir.learning.losses import bce_with_logits_loss
+from xpmir.letor.trainers.pairwise import CrossEntropyLoss
 
 
 def test_pairwise_bce_loss():
@@ -8,3 +10,12 @@ def test_pairwise_bce_loss():
         (12,), dtype=torch.double, requires_grad=True
     ).abs(), torch.randint(0, 2, (12,))
     gradcheck(bce_with_logits_loss, input, eps=1e-6, atol=1e-4)
+
+
+def test_pairwise_cross_entropy_loss():
+    """The cached targets are (re)allocated when needed"""
+    loss = CrossEntropyLoss.C().instance()
+    for size in (12, 4, 2000):
+        scores = torch.randn(size, 2)
+        expected = F.cross_entropy(scores, torch.zeros(size, dtype=torch.long))
+        assert torch.allclose(loss.compute(scores, None), expected)
@@ -0,0 +1,41 @@
+import pytest
+import torch
+
+from xpmir.learning.metrics import Metrics, ScalarMetric
+
+DEVICES = ["cpu"] + (["cuda"] if torch.cuda.is_available() else [])
+
+
+class Writer:
+    def __init__(self):
+        self.scalars = {}
+
+    def add_scalar(self, key, value, step):
+        self.scalars[key] = (value, step)
+
+
+@pytest.mark.parametrize("device", DEVICES)
+def test_scalar_metric_tensor(device: str):
+    """Tensor metrics are merged and reported as float ones"""
+    values = [(0.5, 2), (1.25, 3), (-0.75, 1)]
+
+    reports = []
+    for to_value in (float, lambda value: torch.tensor(value, device=device)):
+        metrics = Metrics()
+        for value, count in values:
+            metrics.add(ScalarMetric("loss", to_value(value), count))
+
+        writer = Writer()
+        metrics.report(10, writer, "train")
+        reports.append(writer.scalars)
+
+        metric = metrics.metrics["loss"]
+        assert metric.count == 6
+        assert isinstance(metric.compute(), float)
+        assert metric.compute() == pytest.approx((1 + 3.75 - 0.75) / 6)
+
+    float_report, tensor_report = reports
+    assert tensor_report.keys() == float_report.keys() == {"train/loss"}
+    value, step = tensor_report["train/loss"]
+    assert isinstance(value, float) and step == 10
+    assert value == pytest.approx(float_report["train/loss"][0])
@@ -3,6 +3,7 @@ import pytest
 import numpy as np
 from typing import Iterator, Tuple
 from experimaestro import Param
+import experimaestro.taskglobals as taskglobals
 import datamaestro_text.data.ir as ir
 from xpmir.rankers import Retriever
 from xpmir.letor.samplers import (
@@ -58,6 +59,40 @@ def test_serializing_tripletbasedsampler():
         assert expected.negative[ir.TextItem].text == record.negative[ir.TextItem].text
 
 
+class MyFiniteTrainingTriplets(MyTrainingTriplets):
+    def iter(
+        self,
+    ) -> Iterator[Tuple[ir.TopicRecord, ir.DocumentRecord, ir.DocumentRecord]]:
+        for count in range(20):
+            yield ir.create_record(text=f"q{count}"), ir.create_record(
+                id=f"{count}+", text=f"doc+{count}"
+            ), ir.create_record(id=f"{count}-", text=f"doc-{count}")
+
+
+def test_cached_tripletbasedsampler(tmp_path, monkeypatch):
+    """Cached triplets should be the same as the source ones"""
+    monkeypatch.setattr(taskglobals.Env.instance(), "wspath", tmp_path)
+    monkeypatch.setattr(taskglobals.Env.instance(), "taskpath", tmp_path)
+    source = MyFiniteTrainingTriplets(id="test-triplets")
+
+    for _ in range(2):
+        config = TripletBasedSampler.C(source=source, cached=True)
+        sampler = config.instance()
+        # Set when the configuration is loaded within a task
+        sampler.__xpmidentifier__ = config.__identifier__()
+        sampler.__xpmtypename__ = str(config.__xpmtype__.identifier)
+        records = list(sampler.pairwise_iter())
+        assert len(records) == 20
+        for record, (topic, pos, neg) in zip(records, source.iter()):
+            assert record.query[ir.TextItem].text == topic[ir.TextItem].text
+            assert record.positive[ir.IDItem].id == pos[ir.IDItem].id
+            assert record.negative[ir.TextItem].text == neg[ir.TextItem].text
+
+    iter = sampler.pairwise_iter()
+    iter.load_state_dict({"count": 15})
+    assert next(iter).query[ir.TextItem].text == "q15"
+
+
 class GeneratedDocuments(ir.Documents):
     pass
 
@@ -1,3 +1,16 @@
+import numpy as np
+import pytest
+import torch
+
+from xpmir.letor.samplers import TripletBasedSampler
+from xpmir.letor.trainers.pairwise import (
+    CrossEntropyLoss,
+    PairwiseTargetsIterator,
+    PairwiseTrainer,
+)
+from xpmir.test.letor.test_samplers import MyTrainingTriplets
+
+
 def test_pointwise():
     # TODO: implement tests for trainers
     pass
@@ -11,3 +24,49 @@ def test_pairwise():
 def test_batchwise():
     # TODO: implement tests for trainers
     pass
+
+
+def test_pairwise_targets_resume():
+    """Swaps are the same when resuming from a saved state"""
+
+    def targets_iter():
+        sampler = TripletBasedSampler.C(
+            source=MyTrainingTriplets.C(id="test-triplets")
+        ).instance()
+        return PairwiseTargetsIterator(
+            sampler.pairwise_batch_iter(8), np.random.default_rng(0)
+        )
+
+    def targets(iter, n):
+        return [next(iter).get_target() for _ in range(n)]
+
+    iter = targets_iter()
+    targets(iter, 3)
+    state = iter.state_dict()
+    expected = targets(iter, 3)
+
+    iter = targets_iter()
+    iter.load_state_dict(state)
+    assert targets(iter, 3) == expected
+
+
+def test_pairwise_check_finite():
+    """Non-finite scores abort training at the next check"""
+    trainer = PairwiseTrainer.C(
+        lossfn=CrossEntropyLoss.C(),
+        sampler=TripletBasedSampler.C(source=MyTrainingTriplets.C(id="triplets")),
+        check_finite_every=4,
+    ).instance()
+
+    finite = torch.ones(8)
+    for _ in range(4):
+        trainer.check_finite(finite)
+
+    # Not checked in the middle of the window...
+    trainer.check_finite(finite)
+    trainer.check_finite(torch.tensor([1.0, float("nan")]))
+    trainer.check_finite(finite)
+
+    # ...but at its end
+    with pytest.raises(SystemExit):
+        trainer.check_finite(finite)
@@ -0,0 +1,190 @@
+from pathlib import Path
+
+import pytest
+import torch
+from torch import nn
+
+from datamaestro_text.data.ir import create_record
+
+from xpmir.learning.optim import ModuleInitMode
+from xpmir.letor.records import PairwiseRecord, PairwiseRecords
+from xpmir.neural.dual import DotDense
+from xpmir.neural.splade import (
+    MaxAggregation,
+    SpladeTextEncoder,
+    SpladeTextEncoderV2,
+    _prune,
+)
+from xpmir.text.huggingface import TransformerTokensEncoderWithMLMOutput
+from xpmir.text.huggingface.base import HFMaskedLanguageModel
+from xpmir.text.huggingface.tokenizers import HFStringTokenizer
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 100])
+def test_max_aggregation_chunks(chunk_size: int):
+    """Chunked projections give the same outputs and gradients"""
+    torch.manual_seed(0)
+    linear = nn.Linear(8, 50)
+    input = torch.randn(3, 11, 8)
+    mask = torch.ones(3, 11)
+    mask[1, 5:] = 0
+    mask[2, 9:] = 0
+
+    def run(aggregation: MaxAggregation):
+        linear.zero_grad()
+        x = input.clone().requires_grad_()
+        output = aggregation.project(linear, x, mask)
+        (output * torch.arange(50)).sum().backward()
+        return output, x.grad, linear.weight.grad.clone(), linear.bias.grad.clone()
+
+    expected = run(MaxAggregation.C().instance())
+    for value, expected_value in zip(
+        run(MaxAggregation.C(chunk_size=chunk_size).instance()), expected
+    ):
+        assert torch.allclose(value, expected_value, atol=1e-6)
+
+
+def test_max_aggregation_chunks_memory():
+    """The chunk logits are not saved for the backward pass"""
+    linear = nn.Linear(8, 500)
+    input = torch.randn(2, 64, 8, requires_grad=True)
+    mask = torch.ones(2, 64)
+
+    saved = {}
+
+    def pack(tensor: torch.Tensor):
+        storage = tensor.untyped_storage()
+        saved[storage.data_ptr()] = storage.nbytes()
+        return tensor
+
+    with torch.autograd.graph.saved_tensors_hooks(pack, lambda tensor: tensor):
+        MaxAggregation.C(chunk_size=8).instance().project(linear, input, mask)
+
+    logits_size = 2 * 64 * 500 * 4
+    assert sum(saved.values()) < logits_size / 2
+
+
+def test_prune():
+    """Only the top-k weights of each representation are kept"""
+    torch.manual_seed(0)
+    values = torch.relu(torch.randn(4, 100)) + 1e-3
+    pruned = _prune(values, 10)
+
+    assert ((pruned != 0).sum(dim=-1) == 10).all()
+    top_values, indices = values.topk(10, dim=-1)
+    assert torch.equal(pruned.gather(-1, indices), top_values)
+    assert torch.allclose(pruned.sum(-1), top_values.sum(-1))
+
+    assert _prune(values, None) is values
+    assert _prune(values, 100) is values
+
+
+@pytest.fixture(scope="module")
+def tiny_mlm(tmp_path_factory) -> str:
+    """Saves a tiny (random) BERT masked language model"""
+    from transformers import BertConfig, BertForMaskedLM, BertTokenizerFast
+
+    path: Path = tmp_path_factory.mktemp("tiny-mlm")
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    words += [f"w{ix}" for ix in range(40)]
+    (path / "vocab.txt").write_text("\n".join(words))
+    BertTokenizerFast(str(path / "vocab.txt"), model_max_length=64).save_pretrained(
+        path
+    )
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(words),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        max_position_embeddings=64,
+    )
+    BertForMaskedLM(config).save_pretrained(path)
+    return str(path)
+
+
+def splade_v1(model_id: str, **kwargs):
+    return SpladeTextEncoder.C(
+        encoder=TransformerTokensEncoderWithMLMOutput.C(
+            model_id=model_id, trainable=True
+        ),
+        aggregation=MaxAggregation.C(),
+        **kwargs,
+    )
+
+
+def splade_v2(model_id: str, chunk_size=None, **kwargs):
+    return SpladeTextEncoderV2.C(
+        tokenizer=HFStringTokenizer.from_pretrained_id(model_id),
+        encoder=HFMaskedLanguageModel.from_pretrained_id(model_id),
+        aggregation=MaxAggregation.C(chunk_size=chunk_size),
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize(
+    "factory,kwargs",
+    [
+        (splade_v1, {"gradient_checkpointing": True}),
+        (splade_v2, {"gradient_checkpointing": True}),
+        (splade_v2, {"chunk_size": 2}),
+        (splade_v2, {"chunk_size": 2, "gradient_checkpointing": True}),
+    ],
+)
+def test_splade_encoder_options(tiny_mlm: str, factory, kwargs):
+    """Memory saving options give the same outputs and gradients"""
+    texts = ["w1 w2 w3 w4 w5 w1", "w4 w7", "w10 w2 w3"]
+
+    def run(**kwargs):
+        encoder = factory(tiny_mlm, **kwargs).instance()
+        encoder.initialize(ModuleInitMode.DEFAULT.to_options())
+        # No dropout
+        encoder.eval()
+
+        output = encoder(texts).value
+        output.sum().backward()
+        return output, {
+            name: param.grad
+            for name, param in encoder.named_parameters()
+            if param.grad is not None
+        }
+
+    expected, expected_grads = run()
+    output, grads = run(**kwargs)
+
+    assert torch.allclose(output, expected, atol=1e-6)
+    assert grads.keys() == expected_grads.keys() and len(grads) > 0
+    for name, grad in grads.items():
+        assert torch.allclose(grad, expected_grads[name], atol=1e-6), name
+
+
+def test_dotdense_joint_encoding(tiny_mlm: str):
+    """Encoding queries and documents jointly gives the same scores"""
+    inputs = PairwiseRecords()
+    inputs.add(
+        PairwiseRecord(
+            create_record(text="w1 w2"),
+            create_record(id="d1", text="w1 w3 w4 w5 w6 w7"),
+            create_record(id="d2", text="w8 w2 w9"),
+        )
+    )
+    inputs.add(
+        PairwiseRecord(
+            create_record(text="w10"),
+            create_record(id="d3", text="w10 w11 w12"),
+            create_record(id="d4", text="w1 w2 w3 w4 w5 w6 w7 w8"),
+        )
+    )
+
+    def scores(joint_encoding: bool):
+        model = DotDense.C(
+            encoder=splade_v1(tiny_mlm), joint_encoding=joint_encoding
+        ).instance()
+        model.initialize(ModuleInitMode.DEFAULT.to_options())
+        model.eval()
+        with torch.no_grad():
+            return model(inputs, None)
+
+    assert torch.allclose(scores(True), scores(False), atol=1e-5)
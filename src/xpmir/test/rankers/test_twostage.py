@@ -0,0 +1,96 @@
+import random
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+import torch
+from experimaestro.notifications import TaskEnv
+from datamaestro_text.data.ir import IDItem, TextItem, TopicRecord, create_record
+
+from xpmir.letor.records import BaseRecords
+from xpmir.rankers import LearnableScorer, Retriever, ScoredDocument, TwoStageRetriever
+from xpmir.test.utils.utils import SampleDocumentStore
+
+
+class CachedRandomScorer(LearnableScorer):
+    def __initialize__(self, options):
+        super().__initialize__(options)
+        self._cache = defaultdict(lambda: random.uniform(0, 1))
+        self.batch_sizes = []
+
+    def forward(self, inputs: BaseRecords, info=None):
+        self.batch_sizes.append(len(inputs))
+        return torch.DoubleTensor(
+            [
+                self._cache[(topic[TextItem].text, document[TextItem].text)]
+                for topic, document in zip(inputs.topics, inputs.documents)
+            ]
+        )
+
+
+class AllDocumentsRetriever(Retriever):
+    def retrieve(self, record: TopicRecord):
+        return [ScoredDocument(d, 0.0) for d in self.store.documents.values()]
+
+
+@pytest.mark.parametrize("batch_topics,prefetch", [(True, 0), (False, 2)])
+def test_twostage_retrieve_all(tmp_path: Path, batch_topics: bool, prefetch: int):
+    NUM_DOCS = 7
+    NUM_QUERIES = 9
+    TaskEnv.instance().taskpath = tmp_path
+
+    documents = SampleDocumentStore(num_docs=NUM_DOCS)
+    retriever = TwoStageRetriever.C(
+        retriever=AllDocumentsRetriever.C(store=documents),
+        scorer=CachedRandomScorer.C(),
+        batchsize=5,
+        batch_topics=batch_topics,
+        prefetch=prefetch,
+        top_k=4,
+    ).instance()
+    retriever.initialize()
+
+    queries = {qid: create_record(text=f"Query {qid}") for qid in range(NUM_QUERIES)}
+
+    # Retrieve query per query
+    expected = {qid: retriever.retrieve(query) for qid, query in queries.items()}
+
+    # Retrieve all the topics at once
+    all_results = retriever.retrieve_all(queries)
+
+    assert all_results.keys() == expected.keys()
+    for qid, results in all_results.items():
+        assert [d.document[IDItem].id for d in expected[qid]] == [
+            d.document[IDItem].id for d in results
+        ], "Document IDs do not match"
+        assert [d.score for d in expected[qid]] == [
+            d.score for d in results
+        ], "Scores do not match"
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_twostage_batch_topics_batchsize(tmp_path: Path, prefetch: int):
+    """Pairs from several topics are scored by batches of `batchsize` pairs"""
+    NUM_DOCS = 7
+    NUM_QUERIES = 9
+    TaskEnv.instance().taskpath = tmp_path
+
+    documents = SampleDocumentStore(num_docs=NUM_DOCS)
+    retriever = TwoStageRetriever.C(
+        retriever=AllDocumentsRetriever.C(store=documents),
+        scorer=CachedRandomScorer.C(),
+        batchsize=5,
+        batch_topics=True,
+        prefetch=prefetch,
+        top_k=4,
+    ).instance()
+    retriever.initialize()
+
+    queries = {qid: create_record(text=f"Query {qid}") for qid in range(NUM_QUERIES)}
+    results = retriever.retrieve_all(queries)
+
+    assert all(len(scored_documents) == 4 for scored_documents in results.values())
+    batch_sizes = retriever.scorer.batch_sizes
+    assert sum(batch_sizes) == NUM_DOCS * NUM_QUERIES
+    assert max(batch_sizes) <= 5
+    assert batch_sizes[:-1] == [5] * (len(batch_sizes) - 1)
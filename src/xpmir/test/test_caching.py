@@ -0,0 +1,93 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import datamaestro_text.data.ir as ir
+from datamaestro.record import record_type
+from experimaestro import Param
+import experimaestro.taskglobals as taskglobals
+
+from xpmir.caching import RetrieverCache
+from xpmir.evaluation import get_run
+from xpmir.rankers import Retriever, ScoredDocument
+
+
+class FixedTopics(ir.Topics):
+    texts: Param[Dict[str, str]]
+
+    topic_recordtype = record_type(ir.IDItem, ir.SimpleTextItem)
+
+    def iter(self):
+        for qid, text in self.texts.items():
+            yield ir.create_record(id=qid, text=text)
+
+
+class FakeDocuments(ir.Documents):
+    pass
+
+
+class FakeAssessments(ir.AdhocAssessments):
+    pass
+
+
+class CountingRetriever(Retriever):
+    def initialize(self):
+        self.retrieved = []
+
+    def retrieve(self, record: ir.TopicRecord):
+        self.retrieved.append(record[ir.IDItem].id)
+        text = record[ir.TextItem].text
+        return [ScoredDocument(ir.create_record(id=f"{text}-doc"), 1.0)]
+
+
+def test_get_run_cache(tmp_path: Path, monkeypatch):
+    """Cached results are reused, and keyed on the query text"""
+    monkeypatch.setattr(taskglobals.Env.instance(), "taskpath", tmp_path)
+    config = CountingRetriever.C()
+    retriever = config.instance()
+    # Set when the configuration is loaded within a task
+    retriever.__xpmidentifier__ = config.__identifier__()
+
+    def run(texts):
+        retriever.initialize()
+        dataset = ir.Adhoc.C(
+            id="test",
+            topics=FixedTopics.C(id="", texts=texts),
+            documents=FakeDocuments.C(id=""),
+            assessments=FakeAssessments.C(id=""),
+        ).instance()
+        cache = RetrieverCache(tmp_path / "cache", retriever)
+        return get_run(retriever, dataset, cache)
+
+    expected = {"q1": {"a-doc": 1.0}, "q2": {"b-doc": 1.0}}
+    assert run({"q1": "a", "q2": "b"}) == expected
+    assert retriever.retrieved == ["q1", "q2"]
+
+    # Everything comes from the cache
+    assert run({"q1": "a", "q2": "b"}) == expected
+    assert retriever.retrieved == []
+
+    # Same query ID with another text (e.g. another topic field)
+    assert run({"q1": "c", "q2": "b"}) == {"q1": {"c-doc": 1.0}, "q2": {"b-doc": 1.0}}
+    assert retriever.retrieved == ["q1"]
+
+
+def test_cache_lock(tmp_path: Path):
+    """The cache database is locked (between processes) while opened"""
+    config = CountingRetriever.C()
+    retriever = config.instance()
+    retriever.__xpmidentifier__ = config.__identifier__()
+    cache = RetrieverCache(tmp_path / "cache", retriever)
+
+    def locked_by_another_process():
+        code = (
+            "import fasteners, sys;"
+            f"lock = fasteners.InterProcessLock({str(tmp_path / 'cache.lock')!r});"
+            "sys.exit(0 if lock.acquire(blocking=False) else 1)"
+        )
+        return subprocess.run([sys.executable, "-c", code]).returncode != 0
+
+    with cache:
+        assert locked_by_another_process()
+    assert not locked_by_another_process()
@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+import torch
+
+from xpmir.learning.optim import ModuleInitMode
+from xpmir.text.adapters import MeanTextEncoder
+from xpmir.text.encoders import (
+    TokenizedTextEncoderBase,
+    TokenizerOptions,
+    TokensRepresentationOutput,
+)
+from xpmir.text.tokenizers import TokenizedTexts
+
+
+class WordsEncoder(TokenizedTextEncoderBase[str, TokensRepresentationOutput]):
+    """Encodes each word by a fixed vector, and padding tokens by random ones"""
+
+    def __initialize__(self, options):
+        super().__initialize__(options)
+        self.vectors = {}
+
+    @property
+    def dimension(self) -> int:
+        return 4
+
+    def static(self) -> bool:
+        return True
+
+    def forward(self, texts: List[str], options: Optional[TokenizerOptions] = None):
+        words = [text.split() for text in texts]
+        length = max(len(text_words) for text_words in words)
+
+        value = 100 * torch.randn(len(texts), length, self.dimension)
+        mask = torch.zeros(len(texts), length, dtype=torch.long)
+        for ix, text_words in enumerate(words):
+            for jx, word in enumerate(text_words):
+                if word not in self.vectors:
+                    self.vectors[word] = torch.randn(self.dimension)
+                value[ix, jx] = self.vectors[word]
+            mask[ix, : len(text_words)] = 1
+
+        tokenized = TokenizedTexts(
+            None, None, [len(text_words) for text_words in words], mask
+        )
+        return TokensRepresentationOutput(value, tokenized)
+
+
+def test_mean_text_encoder_padding():
+    """Padding tokens are not part of the mean"""
+    encoder = MeanTextEncoder.C(encoder=WordsEncoder.C()).instance()
+    encoder.initialize(ModuleInitMode.DEFAULT.to_options())
+
+    alone = encoder(["a b c"]).value
+    padded = encoder(["a b c", "a b c d e f"]).value
+
+    vectors = encoder.encoder.vectors
+    expected = torch.stack([vectors["a"], vectors["b"], vectors["c"]]).mean(0)
+    assert torch.allclose(alone[0], expected, atol=1e-6)
+    assert torch.allclose(padded[0], expected, atol=1e-6)
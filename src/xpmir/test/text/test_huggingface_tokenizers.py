@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast
+
+import xpmir.text.huggingface.tokenizers as hf_tokenizers
+from xpmir.learning.optim import ModuleInitMode
+from xpmir.text.huggingface.tokenizers import HFTokenizer
+from xpmir.text.tokenizers import TokenizerOptions
+
+WORDS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + [f"w{ix}" for ix in range(20)]
+
+
+def load_tokenizer(model_id_or_path, model_max_length: int):
+    tokenizer = Tokenizer(
+        models.WordLevel({word: ix for ix, word in enumerate(WORDS)}, "[UNK]")
+    )
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        model_max_length=model_max_length,
+        pad_token="[PAD]",
+        unk_token="[UNK]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+    )
+
+
+def test_hftokenizer_threads(monkeypatch):
+    """Truncation settings do not leak between threads or instances"""
+    monkeypatch.setattr(
+        hf_tokenizers,
+        "_load_config",
+        lambda model_id: SimpleNamespace(max_position_embeddings=512),
+    )
+    monkeypatch.setattr(hf_tokenizers, "_load_tokenizer", load_tokenizer)
+
+    tokenizer = HFTokenizer.C(model_id="test").instance()
+    tokenizer.initialize(ModuleInitMode.DEFAULT.to_options())
+    # Shares the underlying HF tokenizer
+    other = HFTokenizer.C(model_id="test").instance()
+    other.initialize(ModuleInitMode.DEFAULT.to_options())
+    other.tokenizer = tokenizer.tokenizer
+    other._fast = tokenizer._fast
+
+    text = " ".join(WORDS[4:])
+
+    def tokenize(ix: int):
+        instance, max_length = [(tokenizer, 3), (other, 7)][ix % 2]
+        tokenized = instance.tokenize(
+            [text, "w1"], TokenizerOptions(max_length=max_length)
+        )
+        return ix % 2, tokenized.ids.shape[1]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for ix, length in executor.map(tokenize, range(200)):
+            assert length == [3, 7][ix]
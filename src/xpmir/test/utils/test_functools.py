@@ -0,0 +1,71 @@
+from xpmir.rankers import TwoStageRetriever
+from xpmir.rankers.standard import BM25
+from xpmir.test.rankers.test_twostage import AllDocumentsRetriever, CachedRandomScorer
+from xpmir.test.utils.utils import SampleDocumentStore
+from xpmir.utils.functools import config_cache
+
+
+def test_config_cache():
+    calls = []
+
+    @config_cache
+    def build(model, *, k: int = 10):
+        calls.append((model, k))
+        return object()
+
+    first = build(BM25.C(), k=100)
+    assert build(BM25.C(), k=100) is first
+    assert build(BM25.C(k1=0.5), k=100) is not first
+    assert build(BM25.C(), k=10) is not first
+    assert len(calls) == 3
+
+
+def test_config_cache_meta():
+    """Meta parameters (even in nested configurations) are part of the key"""
+    calls = []
+
+    @config_cache
+    def build(retriever):
+        calls.append(retriever)
+        return object()
+
+    def retriever(batchsize: int, base_batchsize: int):
+        base = TwoStageRetriever.C(
+            retriever=AllDocumentsRetriever.C(store=SampleDocumentStore(num_docs=3)),
+            scorer=CachedRandomScorer.C(),
+            top_k=3,
+            batchsize=base_batchsize,
+        )
+        return TwoStageRetriever.C(
+            retriever=base, scorer=CachedRandomScorer.C(), top_k=2, batchsize=batchsize
+        )
+
+    first = build(retriever(4, 4))
+    assert build(retriever(4, 4)) is first
+    assert build(retriever(8, 4)) is not first
+    assert build(retriever(4, 8)) is not first
+    assert len(calls) == 3
+
+
+def test_config_cache_bounded():
+    calls = []
+
+    @config_cache(maxsize=2)
+    def build(value):
+        calls.append(value)
+        return object()
+
+    first = build(1)
+    build(2)
+    assert build(1) is first
+    build(3)
+    assert build(2) is not None and calls == [1, 2, 3, 2]
+
+    build.cache_clear()
+    assert build(1) is not first
+
+    # Unhashable arguments are not cached
+    calls.clear()
+    build({1})
+    build({1})
+    assert calls == [{1}, {1}]
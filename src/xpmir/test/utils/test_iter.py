@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 from typing import Callable
 import logging
 from decorator import decorator
@@ -10,6 +11,7 @@ from xpmir.utils.iter import (
     RandomizedSerializableIterator,
     SerializableIterator,
     RandomStateSerializableAdaptor,
+    threaded_prefetch,
 )
 
 
@@ -82,3 +84,29 @@ def test_iter_random_iterator():
 
     rs = np.random.RandomState()
     return RandomSerializableIterator(rs, create_iter)
+
+
+@iter_checker(steps=5)
+def test_iter_random_generator_iterator():
+    a = list(range(10))
+
+    def create_iter(random: np.random.Generator):
+        while True:
+            yield a[random.integers(len(a))]
+
+    return RandomSerializableIterator(np.random.default_rng(), create_iter)
+
+
+def test_threaded_prefetch():
+    assert list(threaded_prefetch(iter(range(100)), 3)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        list(threaded_prefetch(failing(), 3))
+
+    # Stops the producer when the consumer stops
+    for value in threaded_prefetch(iter(range(100)), 3):
+        break
@@ -1,15 +1,18 @@
-from typing import List
+from typing import List, Optional
 
+from attrs import evolve
+import torch
 from datamaestro.record import Record
 from experimaestro import Param
 from datamaestro_text.data.ir import TextItem
 from xpmir.utils.convert import Converter
 
 from .encoders import InputType, RepresentationOutput, TokenizedTextEncoderBase
+from .tokenizers import TokenizerOptions
 
 
 class MeanTextEncoder(TokenizedTextEncoderBase[InputType, RepresentationOutput]):
-    """Returns the mean of the word embeddings"""
+    """Returns the mean of the word embeddings (padding tokens are ignored)"""
 
     encoder: Param[TokenizedTextEncoderBase[InputType, RepresentationOutput]]
 
@@ -23,11 +26,23 @@ class MeanTextEncoder(TokenizedTextEncoderBase[InputType, RepresentationOutput])
     def dimension(self):
         return self.encoder.dimension
 
-    def forward(self, texts: List[InputType], options=None) -> RepresentationOutput:
-        # emb_texts = self.encoder(texts, options=options)
+    def forward(
+        self, texts: List[InputType], options: Optional[TokenizerOptions] = None
+    ) -> RepresentationOutput:
+        # We need the mask to discard padding tokens
+        options = evolve(options or TokenizerOptions(), return_mask=True)
         emb_texts = self.encoder(texts, options=options)
+
         # Computes the mean over the time dimension (vocab output is batch x time x dim)
-        emb_texts.value = emb_texts.value.mean(1)
+        mask = emb_texts.tokenized.mask
+        if mask is None:
+            emb_texts.value = emb_texts.value.mean(1)
+        else:
+            mask = mask.to(emb_texts.value.dtype)
+            lengths = mask.sum(1, keepdim=True).clamp(min=1)
+            emb_texts.value = (
+                torch.einsum("btd,bt->bd", emb_texts.value, mask) / lengths
+            )
         return emb_texts
 
 
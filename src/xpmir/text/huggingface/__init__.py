@@ -8,7 +8,7 @@ from typing import List, Optional, Tuple, Union
 import torch
 
 from experimaestro.compat import cached_property
-from experimaestro import Param, Constant, deprecate
+from experimaestro import Meta, Param, Constant, deprecate
 from xpmir.distributed import DistributableModel
 from xpmir.learning.optim import ModuleInitMode, ModuleInitOptions
 from xpmir.text.encoders import (
@@ -71,6 +71,10 @@ class BaseTransformer(Encoder):
     dropout: Param[Optional[float]] = 0
     """(deprecated) Define a dropout for all the layers"""
 
+    attn_implementation: Meta[Optional[str]] = None
+    """The attention implementation (e.g. `sdpa` for PyTorch fused attention,
+    or `flash_attention_2`) – if not set, uses the HuggingFace default"""
+
     CLS: int
     SEP: int
 
@@ -105,11 +109,18 @@ class BaseTransformer(Encoder):
 
         local_files_only = os.environ.get("HF_HUB_OFFLINE", False)
 
+        kwargs = {}
+        if self.attn_implementation is not None:
+            kwargs["attn_implementation"] = self.attn_implementation
+
         if options.mode == ModuleInitMode.NONE or options.mode == ModuleInitMode.RANDOM:
-            self.model = self.automodel.from_config(self.config)
+            self.model = self.automodel.from_config(self.config, **kwargs)
         else:
             self.model = self.automodel.from_pretrained(
-                self.model_id, config=self.config, local_files_only=local_files_only
+                self.model_id,
+                config=self.config,
+                local_files_only=local_files_only,
+                **kwargs,
             )
 
         # Loads the tokenizer
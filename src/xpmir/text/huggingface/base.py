@@ -3,10 +3,10 @@ import os
 from abc import ABC, abstractmethod
 from dataclasses import InitVar
 from pathlib import Path
-from typing import Any, Tuple, Type
+from typing import Any, Optional, Tuple, Type
 
 import torch.nn as nn
-from experimaestro import Config, Param
+from experimaestro import Config, Meta, Param
 
 from xpmir.learning import Module
 from xpmir.learning.optim import ModuleInitMode, ModuleInitOptions
@@ -49,6 +49,16 @@ class HFModelConfigFromId(HFModelConfig):
     model_id: Param[str]
     """HuggingFace Model ID"""
 
+    attn_implementation: Meta[Optional[str]] = None
+    """The attention implementation (e.g. `sdpa` for PyTorch fused attention,
+    or `flash_attention_2`) – if not set, uses the HuggingFace default"""
+
+    @property
+    def model_kwargs(self):
+        if self.attn_implementation is None:
+            return {}
+        return {"attn_implementation": self.attn_implementation}
+
     def get_config(
         self,
         options: ModuleInitOptions,
@@ -92,7 +102,9 @@ class HFModelConfigFromId(HFModelConfig):
 
         if options.mode == ModuleInitMode.NONE or options.mode == ModuleInitMode.RANDOM:
             logging.info("Random initialization of HF model")
-            return config, automodel.from_config(config, trust_remote_code=True)
+            return config, automodel.from_config(
+                config, trust_remote_code=True, **self.model_kwargs
+            )
 
         logging.info(
             "Loading model from HF (%s) with model %s.%s",
@@ -105,6 +117,7 @@ class HFModelConfigFromId(HFModelConfig):
             config=config,
             trust_remote_code=True,
             local_files_only=is_local_files_only(),
+            **self.model_kwargs,
         )
 
 
@@ -1,8 +1,11 @@
+import copy
 import os
+import threading
 from pathlib import Path
 import logging
 from typing import List, Optional, Tuple, Union
-from functools import cached_property
+from functools import cached_property, lru_cache
+import numpy as np
 import torch
 from experimaestro import Config, Param
 
@@ -26,6 +29,32 @@ except Exception:
 HFTokenizerInput = Union[List[str], List[Tuple[str, str]]]
 
 
+def _as_tensor(values) -> Optional[torch.Tensor]:
+    """Converts (padded) lists of integers into a long tensor
+
+    Going through numpy is much faster than :func:`torch.tensor` on nested
+    lists"""
+    if values is None:
+        return None
+    return torch.from_numpy(np.array(values, dtype=np.int64))
+
+
+@lru_cache(maxsize=16)
+def _load_config(model_id_or_path: Union[str, Path]):
+    return AutoConfig.from_pretrained(model_id_or_path)
+
+
+@lru_cache(maxsize=16)
+def _load_tokenizer(model_id_or_path: Union[str, Path], model_max_length: int):
+    """Loads a tokenizer, sharing instances between HFTokenizer configurations
+    (the Rust tokenizer, whose truncation and padding settings are modified,
+    is copied for each instance and thread, see
+    :meth:`HFTokenizer._fast_tokenizer`)"""
+    return AutoTokenizer.from_pretrained(
+        model_id_or_path, model_max_length=model_max_length
+    )
+
+
 class HFTokenizer(Config, Initializable):
     """This is the main tokenizer class"""
 
@@ -54,53 +83,198 @@ class HFTokenizer(Config, Initializable):
                 )
 
         # Load config to read `max_position_embeddings` as proxy for `max_length`
-        self.config = AutoConfig.from_pretrained(model_id_or_path)
+        self.config = _load_config(model_id_or_path)
 
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            model_id_or_path, model_max_length=min(self.max_length, self.config.max_position_embeddings)
+        self.tokenizer = _load_tokenizer(
+            model_id_or_path,
+            min(self.max_length, self.config.max_position_embeddings),
         )
 
         self.cls = self.tokenizer.cls_token
         self.cls_id = self.tokenizer.cls_token_id
         self.sep_id = self.tokenizer.sep_token_id
 
+        # Use directly the Rust tokenizer when possible (avoids the python
+        # wrapper overhead)
+        self._fast = self.tokenizer._tokenizer if self.tokenizer.is_fast else None
+        self._fast_copies = {}
+        self._with_token_type_ids = "token_type_ids" in self.tokenizer.model_input_names
+
+    def _fast_tokenizer(self, max_length: int):
+        """Returns the Rust tokenizer of the current thread, with truncation
+        and padding set up
+
+        Since these settings are stored in the Rust tokenizer, each thread
+        uses its own copy (the original one being shared with other instances
+        and used by the HF wrapper)"""
+        thread_id = threading.get_ident()
+        if (fast := self._fast_copies.get(thread_id)) is None:
+            fast = self._fast_copies[thread_id] = copy.deepcopy(self._fast)
+
+        truncation = fast.truncation
+        if (
+            truncation is None
+            or truncation["max_length"] != max_length
+            or truncation["direction"] != self.tokenizer.truncation_side
+        ):
+            fast.enable_truncation(max_length, direction=self.tokenizer.truncation_side)
+
+        padding = fast.padding
+        if (
+            padding is None
+            or padding["length"] is not None
+            or padding["direction"] != self.tokenizer.padding_side
+        ):
+            fast.enable_padding(
+                direction=self.tokenizer.padding_side,
+                pad_id=self.tokenizer.pad_token_id,
+                pad_type_id=self.tokenizer.pad_token_type_id,
+                pad_token=self.tokenizer.pad_token,
+            )
+        return fast
+
+    def _tokenize_fast(
+        self, texts: HFTokenizerInput, max_length: int, options: TokenizerOptions
+    ) -> TokenizedTexts:
+        fast = self._fast_tokenizer(max_length)
+        encode_batch = getattr(fast, "encode_batch_fast", fast.encode_batch)
+        encodings = encode_batch(list(texts))
+
+        ids = _as_tensor([encoding.ids for encoding in encodings])
+
+        # As with the HF wrapper, lengths are those of the padded sequences
+        lengths, mask, token_type_ids = None, None, None
+        if options.return_length:
+            lengths = torch.full((len(encodings),), ids.shape[1], dtype=torch.long)
+        if options.return_mask:
+            mask = _as_tensor([encoding.attention_mask for encoding in encodings])
+        if self._with_token_type_ids:
+            token_type_ids = _as_tensor([encoding.type_ids for encoding in encodings])
+
+        return TokenizedTexts(None, ids, lengths, mask, token_type_ids)
+
+    @staticmethod
+    def _output(tokenized: TokenizedTexts, options: TokenizerOptions):
+        if options.pin_memory and torch.cuda.is_available():
+            return tokenized.pin_memory()
+        return tokenized
+
+    def _max_length(self, options: TokenizerOptions) -> int:
+        if options.max_length is None:
+            return self.maxtokens()
+        return min(options.max_length, self.maxtokens())
+
     def tokenize(
         self,
         texts: HFTokenizerInput,
         options: Optional[TokenizerOptions] = None,
     ) -> TokenizedTexts:
         options = options or HFTokenizer.DEFAULT_OPTIONS
-        max_length = options.max_length
-        if max_length is None:
-            max_length = self.maxtokens()
-        else:
-            max_length = min(max_length, self.maxtokens())
+        max_length = self._max_length(options)
 
+        if self._fast is not None:
+            tokenized = self._tokenize_fast(texts, max_length, options)
+            return self._output(tokenized, options)
+
+        # Tensors are built directly from the padded lists (rather than with
+        # return_tensors="pt")
         r = self.tokenizer(
             list(texts),
             max_length=max_length,
             truncation=True,
             padding=True,
-            return_tensors="pt",
             return_length=options.return_length,
             return_attention_mask=options.return_mask,
         )
 
-        return TokenizedTexts(
-            None,
-            r["input_ids"],
-            r["length"],
-            r.get("attention_mask", None),
-            r.get("token_type_ids", None),
+        return self._output(
+            TokenizedTexts(
+                None,
+                _as_tensor(r["input_ids"]),
+                _as_tensor(r.get("length", None)),
+                _as_tensor(r.get("attention_mask", None)),
+                _as_tensor(r.get("token_type_ids", None)),
+            ),
+            options,
+        )
+
+    def tokenize_segments(
+        self,
+        text_lists: List[List[str]],
+        options: Optional[TokenizerOptions] = None,
+    ) -> TokenizedTexts:
+        """Tokenizes lists of texts separated by the separator token
+
+        This is equivalent to tokenizing the texts joined by the separator
+        token, but each distinct text is tokenized only once (and the token
+        IDs are then joined)
+        """
+        options = options or HFTokenizer.DEFAULT_OPTIONS
+        max_ids = self._max_length(options) - self.tokenizer.num_special_tokens_to_add()
+
+        segments = list(dict.fromkeys(text for texts in text_lists for text in texts))
+        segment_ids = dict(
+            zip(
+                segments,
+                self.tokenizer(segments, add_special_tokens=False)["input_ids"],
+            )
+        )
+
+        input_ids, token_type_ids = [], []
+        for texts in text_lists:
+            ids = []
+            for ix, text in enumerate(texts):
+                if ix > 0:
+                    ids.append(self.sep_id)
+                ids.extend(segment_ids[text])
+
+            if len(ids) > max_ids:
+                if self.tokenizer.truncation_side == "left":
+                    ids = ids[len(ids) - max_ids :]
+                else:
+                    ids = ids[:max_ids]
+
+            input_ids.append(self.tokenizer.build_inputs_with_special_tokens(ids))
+            token_type_ids.append(
+                self.tokenizer.create_token_type_ids_from_sequences(ids)
+            )
+
+        encoded = {"input_ids": input_ids}
+        if self._with_token_type_ids:
+            encoded["token_type_ids"] = token_type_ids
+        r = self.tokenizer.pad(
+            encoded, return_tensors="pt", return_attention_mask=options.return_mask
+        )
+
+        # As with the HF wrapper, lengths are those of the padded sequences
+        ids = r["input_ids"]
+        lengths = None
+        if options.return_length:
+            lengths = torch.full((len(ids),), ids.shape[1])
+        return self._output(
+            TokenizedTexts(
+                None,
+                ids,
+                lengths,
+                r.get("attention_mask", None),
+                r.get("token_type_ids", None),
+            ),
+            options,
         )
 
     def id2tok(self, idx):
-        """Returns the token strings corresponding to the token ids"""
+        """Returns the token strings corresponding to the token ids (nested
+        lists are returned for tensors with more than one dimension)"""
         if torch.is_tensor(idx):
-            if len(idx.shape) == 0:
-                return self.id2tok(idx.item())
-            return [self.id2tok(x) for x in idx]
-        return self.tokenizer.id_to_token(idx)
+            if idx.dim() == 0:
+                return self.tokenizer.convert_ids_to_tokens(idx.item())
+
+            # Converts all the IDs at once, and then restores the shape
+            tokens = self.tokenizer.convert_ids_to_tokens(idx.reshape(-1).tolist())
+            for size in reversed(idx.shape[1:]):
+                tokens = [tokens[ix : ix + size] for ix in range(0, len(tokens), size)]
+            return tokens
+        return self.tokenizer.convert_ids_to_tokens(idx)
 
     def lexicon_size(self) -> int:
         return self.tokenizer._tokenizer.get_vocab_size()
@@ -193,6 +367,9 @@ class HFListTokenizer(HFTokenizerBase[List[List[str]]]):
     def tokenize(
         self, text_lists: List[List[str]], options: Optional[TokenizerOptions] = None
     ) -> TokenizedTexts:
+        if self.separate_index == 0:
+            return self.tokenizer.tokenize_segments(text_lists, options=options)
+
         return self.tokenizer.tokenize(
             [self.join(text_list) for text_list in text_lists],
             options=options,
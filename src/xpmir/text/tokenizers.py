@@ -11,7 +11,7 @@ from xpmir.text.utils import lengthToMask
 from xpmir.learning.optim import ModuleInitOptions
 from xpmir.utils.utils import Initializable
 from xpmir.utils.misc import opt_slice
-from xpmir.utils.torch import to_device
+from xpmir.utils.torch import pin_memory, to_device
 
 
 class TokenizedTexts(NamedTuple):
@@ -45,15 +45,28 @@ class TokenizedTexts(NamedTuple):
         )
 
     def to(self, device: torch.device):
-        if device is self.ids.device:
+        if device == self.ids.device:
             return self
 
+        # Copies from pinned memory can be asynchronous
+        non_blocking = self.ids.is_pinned()
         return TokenizedTexts(
             self.tokens,
-            self.ids.to(device),
+            self.ids.to(device, non_blocking=non_blocking),
             self.lens,
-            to_device(self.mask, device),
-            to_device(self.token_type_ids, device),
+            to_device(self.mask, device, non_blocking),
+            to_device(self.token_type_ids, device, non_blocking),
+        )
+
+    def pin_memory(self):
+        """Returns the tokenized texts with tensors in pinned memory (which
+        speeds up transfers to the GPU)"""
+        return TokenizedTexts(
+            self.tokens,
+            self.ids.pin_memory(),
+            self.lens,
+            pin_memory(self.mask),
+            pin_memory(self.token_type_ids),
         )
 
     def subset(self, ids: torch.Tensor) -> "TokenizedTexts":
@@ -162,6 +175,9 @@ class TokenizerOptions:
     max_length: Optional[int] = None
     return_mask: Optional[bool] = True
     return_length: Optional[bool] = True
+    pin_memory: Optional[bool] = False
+    """Put the output tensors in pinned memory (if CUDA is available), so they
+    can be asynchronously copied to the GPU"""
 
 
 class TokenizerBase(
@@ -1,4 +1,7 @@
-from functools import lru_cache, partial
+from collections import OrderedDict
+from functools import lru_cache, partial, wraps
+
+from experimaestro import Config
 
 try:
     from functools import cache
@@ -12,3 +15,63 @@ except ImportError:
 def partial_cache(func, *args, **kwargs):
     """Combines a lru_cache with a partial"""
     return cache(partial(func, *args, **kwargs))
+
+
+def _config_key(value):
+    """Returns a hashable key for a value, where configurations are identified
+    by their identifier and the values of their `Meta` parameters (which are
+    not part of the identifier)"""
+    if isinstance(value, Config):
+        values = value.__xpm__.values
+        meta = tuple(
+            (name, _config_key(values.get(name)))
+            for name, argument in value.__xpmtype__.arguments.items()
+            if argument.ignored or isinstance(values.get(name), (Config, list, dict))
+        )
+        return value.__identifier__().all, meta
+    if isinstance(value, (list, tuple)):
+        return tuple(_config_key(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _config_key(item)) for key, item in value.items()))
+    return value
+
+
+def config_cache(fn=None, *, maxsize: int = 32):
+    """Decorator
+
+    Caches the result of a function whose arguments can be experimaestro
+    configurations: those are not hashable, and are compared through their
+    identifier and `Meta` parameters instead. This ensures that identical
+    calls return the same configuration object.
+
+    At most `maxsize` results are kept (least recently used ones are
+    discarded), and calls with unhashable arguments are not cached. The cache
+    can be emptied with `cache_clear()`.
+    """
+    if fn is None:
+        return partial(config_cache, maxsize=maxsize)
+
+    results = OrderedDict()
+
+    @wraps(fn)
+    def _fn(*args, **kwargs):
+        key = (
+            tuple(_config_key(arg) for arg in args),
+            tuple(sorted((name, _config_key(arg)) for name, arg in kwargs.items())),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return fn(*args, **kwargs)
+
+        if key in results:
+            results.move_to_end(key)
+            return results[key]
+
+        result = results[key] = fn(*args, **kwargs)
+        if len(results) > maxsize:
+            results.popitem(last=False)
+        return result
+
+    _fn.cache_clear = results.clear
+    return _fn
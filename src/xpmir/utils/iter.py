@@ -1,7 +1,8 @@
 import numpy as np
 import atexit
 from abc import ABC, abstractmethod
-from queue import Full, Empty
+from queue import Full, Empty, Queue
+from threading import Event, Thread
 import torch.multiprocessing as mp
 from typing import (
     Generic,
@@ -155,20 +156,74 @@ class GenericSerializableIterator(SerializableIterator[T, State]):
         return self.next()
 
 
+def threaded_prefetch(iterable: Iterable[T], size: int) -> Iterator[T]:
+    """Iterates over `iterable` within a background thread, computing at most
+    `size` items in advance (exceptions are raised in the consumer thread)"""
+    queue = Queue(size)
+    stopping = Event()
+
+    def put(item) -> bool:
+        while not stopping.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for value in iterable:
+                if not put((True, value)):
+                    return
+            put((False, None))
+        except Exception as e:
+            put((False, e))
+
+    thread = Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            has_value, value = queue.get()
+            if not has_value:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stopping.set()
+        thread.join()
+
+
+def get_random_state(random: np.random.Generator):
+    """Returns the state of a random generator (or legacy random state)"""
+    if isinstance(random, np.random.RandomState):
+        return random.get_state()
+    return random.bit_generator.state
+
+
+def set_random_state(random: np.random.Generator, state):
+    """Sets the state of a random generator (or legacy random state)"""
+    if isinstance(random, np.random.RandomState):
+        random.set_state(state)
+    else:
+        random.bit_generator.state = state
+
+
 class RandomSerializableIterator(SerializableIterator[T, Any]):
     """A serializable iterator based on a random seed"""
 
     def __init__(
         self,
-        random: np.random.RandomState,
-        generator: Callable[[np.random.RandomState], Iterator[T]],
+        random: np.random.Generator,
+        generator: Callable[[np.random.Generator], Iterator[T]],
     ):
         """Creates a new iterator based on a random generator
 
         Args:
-            random (np.random.RandomState): The initial random state
+            random (np.random.Generator): The initial random state
 
-            generator (Callable[[np.random.RandomState], Iterator[T]]): Generate
+            generator (Callable[[np.random.Generator], Iterator[T]]): Generate
             a new iterator from a random seed
         """
         self.random = random
@@ -176,11 +231,11 @@ class RandomSerializableIterator(SerializableIterator[T, Any]):
         self.iter = generator(random)
 
     def load_state_dict(self, state):
-        self.random.set_state(state["random"])
+        set_random_state(self.random, state["random"])
         self.iter = self.generator(self.random)
 
     def state_dict(self):
-        return {"random": self.random.get_state()}
+        return {"random": get_random_state(self.random)}
 
     def __next__(self):
         return next(self.iter)
@@ -193,7 +248,7 @@ class RandomizedSerializableIteratorState(TypedDict):
 
 class RandomStateSerializableIterator(SerializableIterator[T, State], ABC):
     @abstractmethod
-    def set_random(self, random: np.random.RandomState):
+    def set_random(self, random: np.random.Generator):
         ...
 
 
@@ -204,7 +259,7 @@ class RandomStateSerializableAdaptor(RandomStateSerializableIterator[T, State],
         self.random = None
         self.iterator = iterator
 
-    def set_random(self, random: np.random.RandomState):
+    def set_random(self, random: np.random.Generator):
         self.random = random
 
     def load_state_dict(self, state: State):
@@ -221,14 +276,14 @@ class RandomizedSerializableIterator(
     """Serializable iterator with a random state"""
 
     def __init__(
-        self, random: np.random.RandomState, iterator: RandomStateSerializableIterator
+        self, random: np.random.Generator, iterator: RandomStateSerializableIterator
     ):
         """Creates a new iterator based on a random generator
 
         Args:
-            random (np.random.RandomState): The initial random state
+            random (np.random.Generator): The initial random state
 
-            generator (Callable[[np.random.RandomState], Iterator[T]]): Generate
+            generator (Callable[[np.random.Generator], Iterator[T]]): Generate
             a new iterator from a random seed
         """
         self.random = random
@@ -236,12 +291,15 @@ class RandomizedSerializableIterator(
         iterator.set_random(self.random)
 
     def load_state_dict(self, state: RandomizedSerializableIteratorState[State]):
-        self.random.set_state(state["random"])
+        set_random_state(self.random, state["random"])
         self.iterator.set_random(self.random)
         self.iterator.load_state_dict(state["state"])
 
     def state_dict(self) -> RandomizedSerializableIteratorState[State]:
-        return {"random": self.random.get_state(), "state": self.iterator.state_dict()}
+        return {
+            "random": get_random_state(self.random),
+            "state": self.iterator.state_dict(),
+        }
 
     def __next__(self):
         return next(self.iterator)
@@ -2,8 +2,17 @@ import torch
 from typing import Optional
 
 
-def to_device(tensor: Optional[torch.Tensor], device: torch.device):
+def to_device(
+    tensor: Optional[torch.Tensor], device: torch.device, non_blocking: bool = False
+):
     """Move to device if not None"""
     if tensor is not None:
-        return tensor.to(device)
+        return tensor.to(device, non_blocking=non_blocking)
+    return tensor
+
+
+def pin_memory(tensor: Optional[torch.Tensor]):
+    """Pin memory if not None"""
+    if tensor is not None:
+        return tensor.pin_memory()
     return tensor
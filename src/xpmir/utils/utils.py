@@ -143,22 +143,58 @@ def batchiter(batchsize: int, iter: Iterator[T], keeppartial=True) -> Iterator[L
         yield samples
 
 
+def java_home_cache_path(min_version: int) -> Path:
+    """Path of the file where the JAVA HOME found by :py:func:`find_java_home`
+    is stored"""
+    cache_dir = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    return cache_dir / "xpmir" / f"java_home-{min_version}"
+
+
 @cache
 def find_java_home(min_version: int = 6) -> str:
-    """Find JAVA HOME"""
-    paths = []
+    """Find JAVA HOME
 
+    The result is stored on disk (see :py:func:`java_home_cache_path`) and
+    reused as long as the JAVA_HOME environment variable does not change and
+    the java executable still exists
+    """
     # (1) Use environment variable
     if java_home := os.environ.get("FORCE_JAVA_HOME", None):
         return java_home
 
+    # (2) Use the cached value
+    env_java_home = os.environ.get("JAVA_HOME", "")
+    cache_path = java_home_cache_path(min_version)
+    try:
+        cached_env_java_home, java_home = cache_path.read_text().split("\n")[:2]
+        if (
+            cached_env_java_home == env_java_home
+            and (Path(java_home) / "bin" / "java").exists()
+        ):
+            return java_home
+    except (OSError, ValueError):
+        pass
+
+    # (3) Search and store the result
+    java_home = _search_java_home(min_version)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(f"{env_java_home}\n{java_home}\n")
+    except OSError:
+        logging.warning("Could not store JAVA_HOME in %s", cache_path)
+    return java_home
+
+
+def _search_java_home(min_version: int) -> str:
+    paths = []
+
     if java_home := os.environ.get("JAVA_HOME", None):
         paths.append(Path(java_home) / "bin" / "java")
 
     # Try java
     paths.append("java")
 
-    # (2) Use java -XshowSettings:properties
+    # Use java -XshowSettings:properties
     for p in paths:
         try:
             p = run(